@@ -0,0 +1,482 @@
+import argparse
+import time
+from abc import ABC, abstractmethod
+from copy import deepcopy
+
+import numpy as np
+
+from game import SymbolTable, DIRECTIONS, ORTHOGONAL
+from implementations import implementations, load_game
+
+BLANK = 0
+
+
+class BatchGame(ABC):
+    # N games of one kind advancing in lockstep. All boards live in a single
+    # (N, H, W) int8 array of SymbolTable codes and every rule is a NumPy
+    # operation over the games still in progress. Actions are integers; legal
+    # holds an (N, actions) mask of the ones each game currently accepts.
+    #
+    # The batch starts from the position of a scalar game, and with check > 0
+    # a random sample of that many games is replayed move by move on copies of
+    # it, each disagreement being recorded in mismatches. Players are seats
+    # 0, 1, ... in turn order, seat 0 being whoever moves first in the scalar
+    # game; seats holds the scalar game's value for each.
+    #
+    # The rules follow the rule prompts. Some scalar implementations play
+    # variants of them, which the class attributes of each game select;
+    # implemented maps a model to the rules its implementation plays, as
+    # keyword arguments. stuck_loses makes a player left without a legal
+    # action lose; otherwise the game is over without a winner, like a scalar
+    # game that has no legal move but never declares itself finished
+    pieces = ''
+    players = 2
+    stuck_loses = True
+    implemented = {}
+
+    def __init__(self, game, n, check=0, seed=None, **rules):
+        for name, value in rules.items():
+            if not hasattr(type(self), name):
+                raise TypeError(f'{type(self).__name__} has no rule {name!r}')
+            setattr(self, name, value)
+        self.n = n
+        self.symbols = SymbolTable(self.pieces)
+        self.codes = np.array([self.symbols.code(piece) for piece in self.pieces], dtype=np.int8)
+        self.template = game
+        self.start = self.symbols.encode(np.asarray(game.board.layout))
+        self.height, self.width = self.start.shape
+        self.seats = _seats(game, self.players)
+
+        rng = np.random.default_rng(seed)
+        self.checked = sorted(rng.choice(n, min(check, n), replace=False).tolist())
+        self.reset()
+
+    def reset(self):
+        self.boards = np.repeat(self.start[None], self.n, axis=0)
+        self.player = np.zeros(self.n, dtype=np.int8)
+        self.done = np.zeros(self.n, dtype=bool)
+        self.winner = np.full(self.n, -1, dtype=np.int8)
+        self.ply = 0
+        self.legal = self.legal_mask(np.arange(self.n))
+        self.mismatches = []
+        self._scalar = {i: deepcopy(self.template) for i in self.checked}
+
+    @property
+    def actions(self):
+        return self.legal.shape[1]
+
+    def step(self, actions):
+        # Plays actions[i] in every unfinished game i and returns the done
+        # flags, the winners (-1 for none) and the new legal action masks
+        actions = np.asarray(actions)
+        rows = np.flatnonzero(~self.done)
+        actions = actions[rows]
+        if not self.legal[rows, actions].all():
+            raise ValueError('Illegal action for a game still in progress.')
+
+        moves = {i: self.move(i, actions[rows == i][0]) for i in self._scalar if not self.done[i]}
+
+        finished, winner = self.play(rows, actions)
+        self.player[rows] = (self.player[rows] + 1) % self.players
+        self.legal[rows] = self.legal_mask(rows)
+
+        stuck = ~finished & ~self.legal[rows].any(axis=1)
+        if stuck.any():
+            finished[stuck], winner[stuck] = self.stalled(rows[stuck])
+
+        self.done[rows] = finished
+        self.winner[rows] = winner
+        self.legal[rows[finished]] = False
+        self.ply += 1
+
+        self._check(moves)
+        return self.done.copy(), self.winner.copy(), self.legal
+
+    def sample(self, rng):
+        # One uniformly random legal action per game, 0 for finished games
+        return np.where(self.legal, rng.random(self.legal.shape), -1).argmax(axis=1)
+
+    def layout(self, i):
+        return np.array(self.symbols.chars)[self.boards[i]]
+
+    # Rules, supplied by each game
+    @abstractmethod
+    def legal_mask(self, rows):
+        pass
+
+    @abstractmethod
+    def play(self, rows, actions):
+        # Applies the actions to the given games and returns which of them
+        # finished and their winners
+        pass
+
+    def stalled(self, rows):
+        # Games whose player to move has no legal action. By default that
+        # player loses
+        if not self.stuck_loses:
+            return np.ones(len(rows), dtype=bool), np.full(len(rows), -1, dtype=np.int8)
+        return np.ones(len(rows), dtype=bool), (self.player[rows] - 1) % self.players
+
+    def move(self, i, action):
+        # The move string the scalar game expects for an action of game i
+        x, y = divmod(int(action), self.width)
+        return f'{self.pieces[self.player[i]]} {x},{y}'
+
+    def seat(self, player):
+        # The scalar game's value for a seat, None for -1
+        return None if player < 0 else self.seats[player]
+
+    def _check(self, moves):
+        for i, move in moves.items():
+            scalar = self._scalar[i]
+            try:
+                accepted, finished, winner = scalar.step(move)
+                # A scalar game without a legal move is over whether or not
+                # it says so
+                over = finished or (self.done[i] and not scalar.legal_moves())
+            except Exception as e:
+                self.mismatches.append((i, self.ply, f'scalar game raised {type(e).__name__}: {e}'))
+                del self._scalar[i]
+                continue
+
+            expected = self.symbols.encode(np.asarray(scalar.board.layout))
+            problem = None
+            if not accepted:
+                problem = f'scalar game rejected {move!r}'
+            elif not np.array_equal(expected, self.boards[i]):
+                problem = f'boards differ after {move!r}'
+            elif over != self.done[i]:
+                problem = f'scalar game {"finished" if finished else "continued"} after {move!r}'
+            elif over and winner != self.seat(self.winner[i]):
+                problem = f'scalar winner is {winner}, batch winner is {self.seat(self.winner[i])}'
+            elif not over and self.players > 1 and scalar.current_player != self.seat(self.player[i]):
+                # A single player has no turn order to check
+                problem = f'scalar player to move is {scalar.current_player}'
+
+            if problem is not None:
+                self.mismatches.append((i, self.ply, problem))
+                del self._scalar[i]
+            elif over:
+                del self._scalar[i]
+
+
+def _seats(game, players):
+    # The scalar game's players in turn order, from the one to move
+    scalar, seats = deepcopy(game), [game.current_player]
+    while len(seats) < players:
+        scalar.current_player = scalar.next_player()
+        seats.append(scalar.current_player)
+    return seats
+
+
+def _shifted(mask, dx, dy):
+    # out[..., x, y] = mask[..., x + dx, y + dy], False past the edges
+    out = np.zeros_like(mask)
+    height, width = mask.shape[-2:]
+    if abs(dx) >= height or abs(dy) >= width:
+        return out
+    out[..., max(0, -dx):height - max(0, dx), max(0, -dy):width - max(0, dy)] = \
+        mask[..., max(0, dx):height - max(0, -dx), max(0, dy):width - max(0, -dy)]
+    return out
+
+
+def _near(mask):
+    # Cells with an orthogonal neighbour in mask
+    return np.any([_shifted(mask, dx, dy) for dx, dy in ORTHOGONAL], axis=0)
+
+
+def _lines(height, width):
+    # Flat cell numbers of every full row, column and main diagonal
+    cells = np.arange(height * width).reshape(height, width)
+    lines = [*cells, *cells.T]
+    if height == width:
+        lines += [cells.diagonal(), np.fliplr(cells).diagonal()]
+    return np.array(lines)
+
+
+class BatchPeridot(BatchGame):
+    # Tic-tac-toe: actions are the cells
+    pieces = 'AV'
+
+    def legal_mask(self, rows):
+        return (self.boards[rows] == BLANK).reshape(len(rows), -1)
+
+    def play(self, rows, actions):
+        own = self.codes[self.player[rows]]
+        flat = self.boards.reshape(self.n, -1)
+        flat[rows, actions] = own
+
+        cells = flat[rows]
+        won = (cells[:, _lines(self.height, self.width)] == own[:, None, None]).all(axis=2).any(axis=1)
+        full = ~(cells == BLANK).any(axis=1)
+        return won | full, np.where(won, self.player[rows], -1).astype(np.int8)
+
+
+class BatchTangerine(BatchGame):
+    # Domineering: actions are the cells, the H covering the one to the right
+    # and the V the one above; a player left without a placement loses. With
+    # ends='mover' the game is over as soon as the player who has just moved
+    # has no placement left, and with ends='both' once neither player has
+    # one, the player who has just moved losing either way
+    pieces = 'HV'
+    ends = 'next'
+    implemented = {
+        'Claude': {'ends': 'mover', 'stuck_loses': False},
+        'DeepSeek': {'ends': 'both', 'stuck_loses': False},
+        'GPT-4o': {'ends': 'mover', 'stuck_loses': False},
+    }
+
+    def _placements(self, boards, player):
+        blank = boards == BLANK
+        horizontal = blank & _shifted(blank, 0, 1)
+        vertical = blank & _shifted(blank, -1, 0)
+        return np.where(player[:, None, None] == 0, horizontal, vertical).reshape(len(boards), -1)
+
+    def legal_mask(self, rows):
+        return self._placements(self.boards[rows], self.player[rows])
+
+    def play(self, rows, actions):
+        player = self.player[rows]
+        x, y = divmod(actions, self.width)
+        self.boards[rows, x, y] = self.codes[player]
+        self.boards[rows, x - (player == 1), y + (player == 0)] = self.codes[player]
+        if self.ends == 'next':
+            return np.zeros(len(rows), dtype=bool), np.full(len(rows), -1, dtype=np.int8)
+
+        boards = self.boards[rows]
+        finished = ~self._placements(boards, player).any(axis=1)
+        if self.ends == 'both':
+            finished &= ~self._placements(boards, 1 - player).any(axis=1)
+        return finished, np.where(finished, 1 - player, -1).astype(np.int8)
+
+
+class BatchQuartz(BatchGame):
+    # Reversi: actions are the cells. A player without a capturing placement
+    # passes, and the game ends when neither has one. With ends='mover' no one
+    # passes, and the game ends once the player who has just moved has no
+    # capturing placement
+    pieces = 'AV'
+    ends = 'both'
+    implemented = {
+        'GPT-4o': {'ends': 'mover', 'stuck_loses': False},
+    }
+
+    def legal_mask(self, rows):
+        return self._captures(self.boards[rows], self.player[rows])
+
+    def _captures(self, boards, player):
+        player = player[:, None, None]
+        own, other = boards == self.codes[player], boards == self.codes[1 - player]
+        legal = np.zeros_like(own)
+        for dx, dy in DIRECTIONS:
+            run, k = _shifted(other, dx, dy), 2
+            while run.any() and k < max(self.height, self.width):
+                legal |= run & _shifted(own, k * dx, k * dy)
+                run &= _shifted(other, k * dx, k * dy)
+                k += 1
+        return (legal & (boards == BLANK)).reshape(len(boards), -1)
+
+    def play(self, rows, actions):
+        player = self.player[rows]
+        own, other = self.codes[player], self.codes[1 - player]
+        x, y = divmod(actions, self.width)
+        self.boards[rows, x, y] = own
+
+        for dx, dy in DIRECTIONS:
+            flips = np.zeros(len(rows), dtype=int)
+            open_ = np.ones(len(rows), dtype=bool)
+            for k in range(1, max(self.height, self.width)):
+                px, py = x + k * dx, y + k * dy
+                inside = (0 <= px) & (px < self.height) & (0 <= py) & (py < self.width)
+                cell = np.where(inside, self.boards[rows, px.clip(0, self.height - 1), py.clip(0, self.width - 1)], BLANK)
+                flips[open_ & (cell == own) & (k > 1)] = k - 1
+                open_ &= cell == other
+                if not open_.any():
+                    break
+            for k in range(1, flips.max(initial=0) + 1):
+                flip = flips >= k
+                self.boards[rows[flip], x[flip] + k * dx, y[flip] + k * dy] = own[flip]
+
+        if self.ends == 'mover':
+            finished = ~self._captures(self.boards[rows], player).any(axis=1)
+            return finished, np.where(finished, self._leader(rows), -1).astype(np.int8)
+        return np.zeros(len(rows), dtype=bool), np.full(len(rows), -1, dtype=np.int8)
+
+    def stalled(self, rows):
+        if self.ends == 'mover':
+            return super().stalled(rows)
+        self.player[rows] = 1 - self.player[rows]
+        self.legal[rows] = self.legal_mask(rows)
+        finished = ~self.legal[rows].any(axis=1)
+        return finished, np.where(finished, self._leader(rows), -1).astype(np.int8)
+
+    def _leader(self, rows):
+        # The player with more pieces, -1 for a tie
+        counts = [(self.boards[rows] == code).sum(axis=(1, 2)) for code in self.codes]
+        return np.select([counts[0] > counts[1], counts[1] > counts[0]], [0, 1], -1)
+
+
+class BatchSaffron(BatchGame):
+    # Tron: actions index ORTHOGONAL. The piece leaves its marker behind and
+    # loses on stepping onto any marker, or when it has nowhere to go.
+    #
+    # Variants: onto_markers=False keeps pieces off markers. marker_first
+    # places the marker before moving, so that the marker travels to the
+    # destination and the piece is gone. ends=None never ends the game, and
+    # ends='adjacent' ends it once a piece is next to its opponent's marker,
+    # which loses (the first such piece in row-major order), or next to a
+    # marker with no blank cell around it, the player who has just moved then
+    # losing if their own piece has no blank neighbour
+    pieces = 'ABab'
+    onto_markers = True
+    marker_first = False
+    ends = 'marker'
+    implemented = {
+        'Claude': {'onto_markers': False, 'ends': 'adjacent', 'stuck_loses': False},
+        'DeepSeek': {'onto_markers': False, 'marker_first': True, 'ends': None, 'stuck_loses': False},
+        'GPT-4o': {'ends': None, 'stuck_loses': False},
+    }
+
+    def _cells(self, boards, codes):
+        # Flat cell of each board's piece, and whether it is on the board
+        own = (boards == codes[:, None, None]).reshape(len(boards), -1)
+        return own.argmax(axis=1), own.any(axis=1)
+
+    def _positions(self, rows):
+        cell, _ = self._cells(self.boards[rows], self.codes[self.player[rows]])
+        return divmod(cell, self.width)
+
+    def _targets(self, rows):
+        x, y = self._positions(rows)
+        steps = np.array(ORTHOGONAL)
+        tx, ty = x[:, None] + steps[:, 0], y[:, None] + steps[:, 1]
+        inside = (0 <= tx) & (tx < self.height) & (0 <= ty) & (ty < self.width)
+        return x, y, tx.clip(0, self.height - 1), ty.clip(0, self.width - 1), inside
+
+    def legal_mask(self, rows):
+        _, _, tx, ty, inside = self._targets(rows)
+        _, present = self._cells(self.boards[rows], self.codes[self.player[rows]])
+        target = self.boards[rows[:, None], tx, ty]
+        if self.onto_markers:
+            return inside & present[:, None] & (target != self.codes[1 - self.player[rows], None])
+        return inside & present[:, None] & (target == BLANK)
+
+    def play(self, rows, actions):
+        player = self.player[rows]
+        x, y, tx, ty, _ = self._targets(rows)
+        index = np.arange(len(rows))
+        tx, ty = tx[index, actions], ty[index, actions]
+
+        lost = np.isin(self.boards[rows, tx, ty], self.codes[2:])
+        if self.marker_first:
+            self.boards[rows, x, y] = BLANK
+            self.boards[rows, tx, ty] = self.codes[player + 2]
+        else:
+            self.boards[rows, tx, ty] = self.codes[player]
+            self.boards[rows, x, y] = self.codes[player + 2]
+
+        if self.ends == 'adjacent':
+            return self._adjacent(rows, player)
+        if self.ends is None:
+            lost[:] = False
+        return lost, np.where(lost, 1 - player, -1).astype(np.int8)
+
+    def _adjacent(self, rows, player):
+        boards = self.boards[rows]
+        near_blank, near_marker = _near(boards == BLANK), _near(np.isin(boards, self.codes[2:]))
+        cells, caught, cornered = [], [], []
+        for piece in range(2):
+            own = boards == self.codes[piece]
+            cells.append(self._cells(boards, self.codes[[piece]])[0])
+            caught.append((own & _near(boards == self.codes[3 - piece])).any(axis=(1, 2)))
+            cornered.append((own & near_marker & ~near_blank).any(axis=(1, 2)))
+        finished = caught[0] | caught[1] | cornered[0] | cornered[1]
+
+        loser = np.select([caught[0] & (~caught[1] | (cells[0] < cells[1])), caught[1]], [0, 1], -1)
+        mover = boards == self.codes[player, None, None]
+        boxed = ~(mover & near_blank).any(axis=(1, 2))
+        loser = np.where((loser < 0) & boxed, player, loser)
+        return finished, np.where(finished & (loser >= 0), 1 - loser, -1).astype(np.int8)
+
+    def move(self, i, action):
+        x, y = (int(v[0]) for v in self._positions(np.array([i])))
+        dx, dy = ORTHOGONAL[action]
+        return f'{x},{y} {x + dx},{y + dy}'
+
+
+class BatchLazuli(BatchGame):
+    # Peg solitaire: action 4 * cell + d jumps the peg on cell over its
+    # neighbour along ORTHOGONAL[d]. Won with a single peg left in the centre
+    pieces = 'X'
+    players = 1
+
+    def legal_mask(self, rows):
+        boards = self.boards[rows]
+        peg, blank = boards == self.codes[0], boards == BLANK
+        jumps = [peg & _shifted(peg, dx, dy) & _shifted(blank, 2 * dx, 2 * dy) for dx, dy in ORTHOGONAL]
+        return np.stack(jumps, axis=-1).reshape(len(rows), -1)
+
+    def play(self, rows, actions):
+        cell, d = divmod(actions, len(ORTHOGONAL))
+        x, y = divmod(cell, self.width)
+        dx, dy = np.array(ORTHOGONAL)[d].T
+        self.boards[rows, x, y] = BLANK
+        self.boards[rows, x + dx, y + dy] = BLANK
+        self.boards[rows, x + 2 * dx, y + 2 * dy] = self.codes[0]
+        return np.zeros(len(rows), dtype=bool), np.full(len(rows), -1, dtype=np.int8)
+
+    def stalled(self, rows):
+        boards = self.boards[rows]
+        alone = (boards == self.codes[0]).sum(axis=(1, 2)) == 1
+        centred = boards[:, self.height // 2, self.width // 2] == self.codes[0]
+        return np.ones(len(rows), dtype=bool), np.where(alone & centred, 0, -1).astype(np.int8)
+
+    def move(self, i, action):
+        cell, d = divmod(int(action), len(ORTHOGONAL))
+        x, y = divmod(cell, self.width)
+        dx, dy = ORTHOGONAL[d]
+        return f'{x},{y} {x + 2 * dx},{y + 2 * dy}'
+
+
+BATCHES = {
+    'peridot': BatchPeridot,
+    'tangerine': BatchTangerine,
+    'quartz': BatchQuartz,
+    'saffron': BatchSaffron,
+    'lazuli': BatchLazuli,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays random games in lockstep, optionally cross-checking a sample against a scalar implementation.')
+    parser.add_argument('game', choices=BATCHES)
+    parser.add_argument('--model', default='Claude', help='Results directory holding the scalar implementation')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--check', type=int, default=0, help='number of games to cross-check')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--plies', type=int, default=1000, help='stop after this many plies')
+    parser.add_argument('--prompt-rules', action='store_true', help='play by the rule prompt rather than as the implementation does')
+    args = parser.parse_args()
+
+    paths = implementations(args.game, args.model)
+    if not paths:
+        parser.error(f'no {args.game} implementation for {args.model}')
+    kind = BATCHES[args.game]
+    rules = {} if args.prompt_rules else kind.implemented.get(args.model, {})
+    batch = kind(load_game(paths[0]), args.games, args.check, args.seed, **rules)
+
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    while not batch.done.all() and batch.ply < args.plies:
+        batch.step(batch.sample(rng))
+    elapsed = time.perf_counter() - start
+
+    ended = batch.winner[batch.done]
+    winners = {batch.seat(w): int(c) for w, c in zip(*np.unique(ended, return_counts=True))}
+    print(f'{args.games} games, {batch.ply} plies in {elapsed:.3f}s; winners {winners}, {int((~batch.done).sum())} unfinished')
+    for i, ply, problem in batch.mismatches:
+        print(f'game {i}, ply {ply}: {problem}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+import argparse
+import cProfile
+import gc
+import io
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+from fnmatch import fnmatch
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import game as framework
+from implementations import REPLAYS, RESULTS, implementations, independent_game, load_game, playout
+
+# Where the time of a ply goes. The first four are game.py's own functions,
+# split by qualified name; 'logic' is the implementation's code; 'other' is
+# whatever could not be traced back to either
+CATEGORIES = ('parsing', 'validation', 'board', 'framework', 'logic', 'other')
+PARSING = {'Move.__new__', 'Move.__setattr__', 'parse_move', '_as_move', 'is_placement', 'is_movement', 'get_move_elements'}
+VALIDATION = {'Game.validate_move'}
+BOARD = ('Board.', 'BitBoard.', 'Layout.', 'CodedLayout.', '_CodedRow.', 'SymbolTable.', '_write_codes', '_cell_index')
+
+
+def scripts(game, games, seed, plies):
+    # Seeded random games of game, as the plain move strings a client sends
+    recorded = []
+    for i in range(games):
+        game.reset()
+        moves, _, _ = playout(game, np.random.default_rng(seed + i), plies)
+        recorded.append([str(move) for move in moves])
+    return recorded
+
+
+def replay(game, recorded, profiler=None):
+    # Plays every recorded game through step. Returns the seconds spent in
+    # step and the plies played; a game stops at the first move it rejects.
+    # The profiler, if any, only runs while moves are played, not over reset
+    elapsed, played = 0.0, 0
+    for moves in recorded:
+        game.reset()
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        for move in moves:
+            accepted, _, _ = game.step(move)
+            if not accepted:
+                break
+            played += 1
+        elapsed += time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+    return elapsed, played
+
+
+def fastest(run, repeat):
+    # The smallest result of repeat calls of run, with the garbage collector
+    # off while they run, as timeit has it
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return min(run() for _ in range(repeat))
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _qualnames(path):
+    # {(first line, name): qualified name} of every function defined in path,
+    # the way cProfile keys them
+    with open(path, encoding='utf-8') as file:
+        code = compile(file.read(), path, 'exec')
+    names, pending = {}, [code]
+    while pending:
+        code = pending.pop()
+        names[code.co_firstlineno, code.co_name] = code.co_qualname
+        pending += [const for const in code.co_consts if hasattr(const, 'co_code')]
+    return names
+
+
+def _category(function, implementation, qualnames):
+    filename, line, name = function
+    filename = os.path.abspath(filename)
+    if filename == implementation:
+        return 'logic'
+    if filename != os.path.abspath(framework.__file__):
+        return None
+    # Layout is defined inside _layout_type, which prefixes its methods'
+    # qualified names
+    qualname = qualnames.get((line, name), name).removeprefix('_layout_type.<locals>.')
+    if qualname in PARSING:
+        return 'parsing'
+    if qualname in VALIDATION:
+        return 'validation'
+    if qualname.startswith(BOARD):
+        return 'board'
+    return 'framework'
+
+
+def breakdown(stats, implementation):
+    # Seconds of profiled time by category. Time in anything else (builtins,
+    # re, copy, numpy) is charged to whatever called it, in proportion to the
+    # time each caller spent there, following callers until one is ours
+    qualnames = _qualnames(framework.__file__)
+    harness = os.path.abspath(__file__)
+    settled = {}
+
+    def shares(function, seen):
+        # Fractions of function's time by category, and whether a caller was
+        # skipped for being on the path already, which makes them partial
+        if function in settled:
+            return settled[function], False
+        own = _category(function, implementation, qualnames)
+        if own is not None:
+            return {own: 1.0}, False
+        weights, cut = Counter(), False
+        for caller, (_, _, _, cumulative) in stats[function][4].items():
+            if caller in seen or caller not in stats:
+                cut = cut or caller in seen
+                continue
+            if os.path.abspath(caller[0]) == harness:
+                continue
+            fractions, partial = shares(caller, seen | {function})
+            cut = cut or partial
+            for category, fraction in fractions.items():
+                weights[category] += cumulative * fraction
+        total = sum(weights.values())
+        result = {category: weight / total for category, weight in weights.items()} if total else {}
+        if not cut:
+            settled[function] = result
+        return result, cut
+
+    seconds = Counter()
+    for function, (_, _, own_time, _, _) in stats.items():
+        if os.path.abspath(function[0]) == harness:
+            continue
+        fractions, _ = shares(function, frozenset())
+        for category, fraction in (fractions or {'other': 1.0}).items():
+            seconds[category] += own_time * fraction
+    return seconds
+
+
+def measure(path, games, seed, plies, repeat):
+    # Per-ply time of replaying random games of one implementation, and its
+    # split by category. The split comes from a profiled replay, whose
+    # overhead weighs most on small functions, and is scaled to the fastest
+    # unprofiled one
+    game = load_game(path)
+    recorded = scripts(game, games, seed, plies)
+    elapsed, played = fastest(lambda: replay(game, recorded), repeat)
+    profiler = cProfile.Profile()
+    replay(game, recorded, profiler)
+    profiler.create_stats()
+    seconds = breakdown(profiler.stats, os.path.abspath(path))
+    total = sum(seconds.values()) or 1.0
+    us_per_ply = elapsed * 1e6 / played if played else 0.0
+    return {
+        'plies': played,
+        'us_per_ply': us_per_ply,
+        'shares': {category: seconds[category] / total for category in CATEGORIES},
+        'framework_us_per_ply': us_per_ply * sum(seconds[c] for c in CATEGORIES[:4]) / total,
+    }
+
+
+def independent(path, recorded, repeat):
+    # Per-ply time of the same games replayed on an -independent script, and
+    # the first (game, ply) it refused, if any
+    new_game, apply = independent_game(path)
+    parsed = [[framework.parse_move(move) for move in moves] for moves in recorded]
+
+    def run():
+        elapsed, played, refused = 0.0, 0, None
+        for i, moves in enumerate(parsed):
+            game = new_game()
+            start = time.perf_counter()
+            for ply, move in enumerate(moves):
+                if not apply(game, move):
+                    refused = refused or (i, ply)
+                    break
+                played += 1
+            elapsed += time.perf_counter() - start
+        return elapsed, played, refused
+
+    # Scripts print as they play, which is part of their time
+    with redirect_stdout(io.StringIO()):
+        elapsed, played, refused = fastest(run, repeat)
+    return {'plies': played, 'us_per_ply': elapsed * 1e6 / played if played else 0.0, 'refused': refused}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Splits the time API implementations spend per ply between game.py and game logic, '
+                                                 'and compares it with -independent scripts replaying the same games.')
+    parser.add_argument('--name', default='*', help='only implementations of this game')
+    parser.add_argument('--model', default='*', help='only implementations from this Results directory')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--plies', type=int, default=200, help='longest game')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='replays timed; the fastest counts')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results, errors = {}, {}
+    for path in implementations(args.name, args.model):
+        label = os.path.relpath(path, RESULTS)[:-3]
+        try:
+            results[label] = measure(path, args.games, args.seed, args.plies, args.repeat)
+        except Exception as e:
+            errors[label] = f'{type(e).__name__}: {e}'
+
+    print(f'{"implementation":<32}{"us/ply":>9}{"game.py":>9}' + ''.join(f'{c:>11}' for c in CATEGORIES) + '   (share of profiled time)')
+    replayed = {label: result for label, result in results.items() if result['plies']}
+    for label, result in sorted(replayed.items(), key=lambda item: -item[1]['framework_us_per_ply']):
+        print(f'{label:<32}{result["us_per_ply"]:>9.1f}{result["framework_us_per_ply"]:>9.1f}'
+              + ''.join(f'{result["shares"][c]:>11.0%}' for c in CATEGORIES))
+    if len(replayed) < len(results):
+        print(f'No legal moves to replay: {", ".join(sorted(set(results) - set(replayed)))}')
+
+    # The API sibling plays the games both sides replay, so the two run the
+    # same moves from the same position
+    compared = {}
+    for label in sorted(REPLAYS):
+        if not fnmatch(label, os.path.join(args.model, f'{args.name}-independent')):
+            continue
+        sibling = os.path.join(RESULTS, label.replace('-independent', '') + '.py')
+        try:
+            game = load_game(sibling)
+            recorded = scripts(game, args.games, args.seed, args.plies)
+            elapsed, played = fastest(lambda: replay(game, recorded), args.repeat)
+            compared[label] = independent(os.path.join(RESULTS, label + '.py'), recorded, args.repeat)
+            compared[label]['api_us_per_ply'] = elapsed * 1e6 / played if played else 0.0
+        except Exception as e:
+            errors[label] = f'{type(e).__name__}: {e}'
+    if compared:
+        print(f'\n{"independent script":<32}{"us/ply":>9}{"API us/ply":>12}{"ratio":>8}')
+        for label, result in compared.items():
+            ratio = result['api_us_per_ply'] / result['us_per_ply'] if result['us_per_ply'] else 0.0
+            refused = '' if result['refused'] is None else f'   refused game {result["refused"][0]} ply {result["refused"][1]}'
+            print(f'{label:<32}{result["us_per_ply"]:>9.1f}{result["api_us_per_ply"]:>12.1f}{ratio:>7.1f}x{refused}')
+    for label, error in errors.items():
+        print(f'{label}: stopped by {error}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'results': results, 'independent': compared, 'errors': errors}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
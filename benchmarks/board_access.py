@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game import AccessCounter
+from implementations import implementations, load_game, playout
+
+
+def count(game, moves):
+    # Replays moves with the board counting, one tick per ply, so that only
+    # the work of accepted moves is measured
+    counter = AccessCounter()
+    game.reset()
+    game.board.count_accesses(counter)
+    for move in moves:
+        game.step(move)
+        counter.tick()
+    return counter.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ranks implementations by the board cells they read per ply over random games.')
+    parser.add_argument('--name', default='*', help='only implementations of this game')
+    parser.add_argument('--model', default='*', help='only implementations from this Results directory')
+    parser.add_argument('--plies', type=int, default=200, help='longest game')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--callers', type=int, default=3, help='heaviest callers shown per implementation')
+    parser.add_argument('--json', help='also write the summaries to this file')
+    args = parser.parse_args()
+
+    summaries, errors = {}, {}
+    for path in implementations(args.name, args.model):
+        label = os.path.relpath(path, os.path.join(ROOT, 'Results'))
+        try:
+            game = load_game(path)
+            moves, _, _ = playout(game, np.random.default_rng(args.seed), args.plies)
+            summaries[label] = count(game, moves)
+        except Exception as e:
+            errors[label] = f'{type(e).__name__}: {e}'
+
+    print(f'{"implementation":<32}{"plies":>7}{"reads/ply":>12}{"peak":>10}{"writes/ply":>12}   heaviest readers')
+    for label, summary in sorted(summaries.items(), key=lambda item: -item[1]['reads_per_ply']):
+        callers = sorted(summary['callers'].items(), key=lambda item: -item[1]['reads'])[:args.callers]
+        heaviest = ', '.join(f'{caller} {counts["reads"] / max(summary["plies"], 1):.0f}' for caller, counts in callers)
+        print(f'{label:<32}{summary["plies"]:>7}{summary["reads_per_ply"]:>12.0f}{summary["peak_reads"]:>10}'
+              f'{summary["writes_per_ply"]:>12.1f}   {heaviest}')
+    for label, error in errors.items():
+        print(f'{label}: stopped by {error}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'summary': summaries, 'errors': errors}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game import Board
+
+ACCESSES = {
+    'read [r][c]': 'layout[r][c]',
+    'read [r, c]': 'layout[r, c]',
+    'iterate rows': 'for row in layout: row[0]',
+    'write [r, c]': "layout[r, c] = 'A'",
+    'write [r][c]': "layout[r][c] = 'A'",
+}
+
+
+def layouts(shape):
+    plain = np.full(shape, Board.BLANK, dtype='<U1')
+    return {'ndarray': plain, 'Board': Board(shape).layout, 'compact Board': Board(shape, compact=True).layout}
+
+
+def measure(shape, number, repeat):
+    # Fastest time per access in microseconds. The kinds of layout take turns
+    # within every repeat so that they see the same machine load
+    r, c = shape[0] // 2, shape[1] // 2
+    kinds = layouts(shape)
+    best = {}
+    for _ in range(repeat):
+        for kind, layout in kinds.items():
+            for access, statement in ACCESSES.items():
+                seconds = timeit.timeit(statement, globals={'layout': layout, 'r': r, 'c': c}, number=number)
+                best[kind, access] = min(best.get((kind, access), seconds), seconds)
+    return {key: seconds / number * 1e6 for key, seconds in best.items()}, list(kinds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times single cell reads and writes through board.layout against a plain array.')
+    parser.add_argument('--shape', type=int, nargs=2, default=(8, 8), metavar=('ROWS', 'COLUMNS'))
+    parser.add_argument('--number', type=int, default=2000, help='accesses per timing')
+    parser.add_argument('--repeat', type=int, default=30, help='timings per access, the fastest counts')
+    args = parser.parse_args()
+
+    timings, kinds = measure(tuple(args.shape), args.number, args.repeat)
+    print(f'{"us per access":<16}' + ''.join(f'{kind:>16}' for kind in kinds))
+    for access in ACCESSES:
+        print(f'{access:<16}' + ''.join(f'{timings[kind, access]:>16.2f}' for kind in kinds))
+
+
+if __name__ == '__main__':
+    main()
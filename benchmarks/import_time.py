@@ -0,0 +1,69 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from implementations import implementations
+
+IMPORT_TIME = re.compile(r'import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*game$', re.MULTILINE)
+
+
+def environment():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    return env
+
+
+def import_ms(env):
+    # Cumulative time of `import game` in a fresh interpreter, as reported by
+    # -X importtime
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import game'],
+                            env=env, capture_output=True, text=True, check=True)
+    return int(IMPORT_TIME.search(result.stderr).group(1)) / 1000
+
+
+def start_ms(path, env):
+    # Wall time for a script to start, build its game and reach the first
+    # prompt, where input() meets an empty stdin and ends the run
+    start = time.perf_counter()
+    subprocess.run([sys.executable, path], env=env, stdin=subprocess.DEVNULL,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Checks the cold start cost of game.py and of every implementation written against it.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget', type=float, default=50, help='milliseconds allowed for import game')
+    parser.add_argument('--start-budget', type=float, default=400, help='milliseconds allowed for a script to reach its first prompt')
+    parser.add_argument('--name', default='*', help='only scripts for this game')
+    args = parser.parse_args()
+
+    env = environment()
+    over = []
+
+    elapsed = median(import_ms(env) for _ in range(args.runs))
+    print(f'{"import game":<40} {elapsed:8.1f} ms')
+    if elapsed > args.import_budget:
+        over.append('import game')
+
+    for path in implementations(args.name):
+        elapsed = median(start_ms(path, env) for _ in range(args.runs))
+        name = os.path.relpath(path, ROOT)
+        print(f'{name:<40} {elapsed:8.1f} ms')
+        if elapsed > args.start_budget:
+            over.append(name)
+
+    if over:
+        print(f'over budget: {", ".join(over)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from implementations import load_game, playout
+from server import MatchServer, play
+
+
+def scripts(game, rng, count, plies):
+    # Random games split into the moves of each seat, seats numbered the way
+    # the server numbers them, with the END line each should produce
+    games = []
+    for _ in range(count):
+        game.reset()
+        moves, finished, winner = playout(game, rng, plies)
+        game.reset()
+        seats, split, number = {}, [], 0
+        for move in moves:
+            player = getattr(game.current_player, 'value', game.current_player)
+            if player is not None:
+                number = seats.setdefault(player, len(seats))
+            split += [[] for _ in range(number + 1 - len(split))]
+            split[number].append(move)
+            game.step(move)
+        if not finished:
+            end = None
+        elif winner is None:
+            end = 'END TIE'
+        else:
+            end = f'END WIN {seats.setdefault(getattr(winner, "value", winner), len(seats))}'
+        games.append((split, end))
+    return games
+
+
+async def run(args, games):
+    server = MatchServer(args.players, args.move_timeout, max_matches=args.max_matches)
+    with tempfile.TemporaryDirectory() as directory:
+        if args.tcp:
+            _, port = await server.start(port=0)
+            where = {'port': port}
+        else:
+            where = {'path': os.path.join(directory, 'server.sock')}
+            await server.start(path=where['path'])
+
+        # Every match is joined by name, seat 0 first, so seats line up with
+        # the scripts
+        async def match(i, split, end):
+            seats = [*split, *[[] for _ in range(server.seats(args.implementation) - len(split))]]
+            clients = []
+            for moves in seats:
+                seated = asyncio.Event()
+                clients.append(asyncio.create_task(play(args.implementation, moves, f'm{i}', seated=seated, **where)))
+                await seated.wait()
+            results = await asyncio.gather(*clients)
+            return end is None or all(result[1] == end for result in results), results
+
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(match(i, split, end) for i, (split, end) in enumerate(games)))
+        elapsed = time.perf_counter() - start
+        await server.close()
+    return outcomes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays random games through a local match server with scripted clients.')
+    parser.add_argument('implementation', help='e.g. Claude/daisy')
+    parser.add_argument('--matches', type=int, default=1000, help='matches played at once')
+    parser.add_argument('--plies', type=int, default=200, help='longest game')
+    parser.add_argument('--players', type=int, help='seats per match, by default the players of the game')
+    parser.add_argument('--max-matches', type=int, default=10000)
+    parser.add_argument('--move-timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tcp', action='store_true', help='connect over TCP instead of a Unix socket')
+    args = parser.parse_args()
+
+    game = load_game(os.path.join(ROOT, 'Results', args.implementation + '.py'))
+    games = scripts(game, np.random.default_rng(args.seed), args.matches, args.plies)
+    outcomes, elapsed = asyncio.run(run(args, games))
+
+    plies = sum(len(moves) for split, _ in games for moves in split)
+    wrong = [i for i, (matched, _) in enumerate(outcomes) if not matched]
+    print(f'{len(games)} matches, {plies} moves in {elapsed:.2f}s: '
+          f'{len(games) / elapsed:.0f} matches/s, {plies / elapsed:.0f} moves/s')
+    for i in wrong[:10]:
+        print(f'match {i} ended {[result[1] for result in outcomes[i][1]]}')
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == '__main__':
+    main()
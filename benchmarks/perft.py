@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from implementations import RESULTS, implementations, load_game
+
+
+class OutOfTime(Exception):
+    pass
+
+
+def perft(game, depth, deadline=None):
+    # Positions exactly depth plies below the game's current position, walking
+    # legal_moves and undoing every move; finished games have no moves, so
+    # they only count as leaves at the last ply. Raises OutOfTime once
+    # perf_counter passes deadline
+    moves = game.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    if deadline is not None and time.perf_counter() > deadline:
+        raise OutOfTime
+    mark = game.mark()
+    total = 0
+    try:
+        for move in moves:
+            accepted, _, _ = game.step(move)
+            if accepted:
+                total += perft(game, depth - 1, deadline)
+            game.undo_to(mark)
+    except OutOfTime:
+        game.undo_to(mark)
+        raise
+    return total
+
+
+def divide(game, depth):
+    # perft split by first move: {move: leaves below it}
+    mark = game.mark()
+    counts = {}
+    for move in game.legal_moves():
+        accepted, _, _ = game.step(move)
+        counts[str(move)] = perft(game, depth - 1) if accepted else 0
+        game.undo_to(mark)
+    return counts
+
+
+def run(game, depth, budget, repeat=1):
+    # perft at depths 1 to depth from the initial position, as deep as budget
+    # seconds allow. Returns the counts of the depths completed and the
+    # leaves counted per second over them. Every depth is counted repeat
+    # times, each from a reset game with no legal moves cached, and the
+    # fastest time counts
+    counts, nodes, elapsed = [], 0, 0.0
+    deadline = time.perf_counter() + budget
+    for d in range(1, depth + 1):
+        fastest = None
+        try:
+            for _ in range(repeat):
+                game.reset()
+                game.__dict__.pop('_legal', None)
+                start = time.perf_counter()
+                count = perft(game, d, deadline)
+                seconds = time.perf_counter() - start
+                fastest = seconds if fastest is None else min(fastest, seconds)
+        except OutOfTime:
+            if fastest is None:
+                break
+        counts.append(count)
+        nodes, elapsed = nodes + count, elapsed + fastest
+    return {'counts': counts, 'nodes_per_sec': nodes / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Counts the leaves of the legal-move tree of every implementation from its initial position.')
+    parser.add_argument('--name', default='*', help='only implementations of this game')
+    parser.add_argument('--model', default='*', help='only implementations from this Results directory')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--budget', type=float, default=10, help='seconds per implementation; deeper counts are dropped once they run out')
+    parser.add_argument('--repeat', type=int, default=3, help='counts timed per depth; the fastest counts')
+    parser.add_argument('--divide', metavar='IMPLEMENTATION', help='per-move counts at --depth for one implementation, e.g. Claude/obsidian')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--baseline', help='compare with results written earlier by --json')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='slowdown against the baseline reported as a regression')
+    args = parser.parse_args()
+
+    if args.divide:
+        game = load_game(os.path.join(RESULTS, args.divide + '.py'))
+        counts = divide(game, args.depth)
+        for move, count in sorted(counts.items()):
+            print(f'{move:<16}{count:>12}')
+        print(f'{"total":<16}{sum(counts.values()):>12}')
+        return
+
+    results, errors = {}, {}
+    for path in implementations(args.name, args.model):
+        label = os.path.relpath(path, RESULTS)[:-3]
+        try:
+            results[label] = run(load_game(path), args.depth, args.budget, args.repeat)
+        except Exception as e:
+            errors[label] = f'{type(e).__name__}: {e}'
+
+    # Builds of one game agree when their counts do as deep as both went
+    games = defaultdict(list)
+    for label, result in results.items():
+        games[os.path.basename(label)].append(result['counts'])
+    print(f'{"implementation":<32}{"nodes/sec":>12}   counts by depth')
+    for label, result in sorted(results.items(), key=lambda item: (os.path.basename(item[0]), item[0])):
+        counts = result['counts']
+        agreed = all(theirs[:len(counts)] == counts[:len(theirs)] for theirs in games[os.path.basename(label)])
+        print(f'{label:<32}{result["nodes_per_sec"]:>12.0f}   {" ".join(map(str, counts))}{"" if agreed else "   differs"}')
+    for label, error in errors.items():
+        print(f'{label}: stopped by {error}')
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        for label, result in sorted(results.items()):
+            before = baseline.get(label)
+            if before is None:
+                continue
+            depth = min(len(before['counts']), len(result['counts']))
+            if before['counts'][:depth] != result['counts'][:depth]:
+                failed = True
+                print(f'{label}: counts changed from {before["counts"][:depth]} to {result["counts"][:depth]}')
+            if result['nodes_per_sec'] < before['nodes_per_sec'] * (1 - args.tolerance):
+                failed = True
+                print(f'{label}: {before["nodes_per_sec"]:.0f} -> {result["nodes_per_sec"]:.0f} nodes/sec')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'depth': args.depth, 'results': results, 'errors': errors}, file, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from implementations import REPLAYS, RESULTS, implementations, independent_game, load_game, playout
+
+# Marks the worker's report among whatever else a script prints
+REPORT = 'playouts: '
+
+# Report fields compared with a baseline, and whether higher is better
+COMPARED = {'games_per_sec': True, 'plies_per_sec': True, 'p50_us': False, 'p99_us': False, 'peak_rss_mb': False}
+
+
+def api_games(path, games, seed, plies):
+    # Random games played through legal_moves and step; every ply's step is
+    # timed, while choosing its move from legal_moves is not. A game the
+    # implementation raises in counts as an error and the next one starts
+    game = load_game(path)
+    latencies, finished, played, errors = [], 0, 0, []
+    start = time.perf_counter()
+    for i in range(games):
+        game.reset()
+        rng = np.random.default_rng(seed + i)
+        try:
+            for _ in range(plies):
+                legal = game.legal_moves()
+                if not legal:
+                    break
+                move = legal[rng.integers(len(legal))]
+                began = time.perf_counter_ns()
+                accepted, done, _ = game.step(move)
+                latencies.append(time.perf_counter_ns() - began)
+                if not accepted:
+                    break
+                played += 1
+                if done:
+                    finished += 1
+                    break
+        except Exception as e:
+            errors.append(f'{type(e).__name__}: {e}')
+    return time.perf_counter() - start, played, finished, latencies, errors
+
+
+def _scripts(path, games, seed, plies):
+    # Random games of an API implementation of the same game as the script at
+    # path, the one next to it if it plays them, otherwise any other: their
+    # moves and whether they finished
+    name = os.path.basename(path).replace('-independent', '')
+    for sibling in [os.path.join(os.path.dirname(path), name)] + implementations(name[:-3]):
+        try:
+            game = load_game(sibling)
+            scripts = []
+            for i in range(games):
+                game.reset()
+                moves, finished, _ = playout(game, np.random.default_rng(seed + i), plies)
+                scripts.append((moves, finished))
+            return scripts
+        except Exception:
+            continue
+    raise ValueError(f'no API implementation of {name} plays random games')
+
+
+def independent_games(path, games, seed, plies):
+    # Scripts with their own board and loop replay, through their entry in
+    # implementations.REPLAYS, random games played by an API implementation;
+    # every move is timed as the script applies it. A game is finished when
+    # the script accepts every move of a game the API implementation finished
+    scripts = _scripts(path, games, seed, plies)
+    new_game, apply = independent_game(path)
+    latencies, finished, played, errors = [], 0, 0, []
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for moves, done in scripts:
+            try:
+                game = new_game()
+                for move in moves:
+                    began = time.perf_counter_ns()
+                    accepted = apply(game, move)
+                    latencies.append(time.perf_counter_ns() - began)
+                    if not accepted:
+                        break
+                    played += 1
+                else:
+                    finished += done
+            except Exception as e:
+                errors.append(f'{type(e).__name__}: {e}')
+    return time.perf_counter() - start, played, finished, latencies, errors
+
+
+def measure(path, games, seed, plies):
+    # The report entry of one script, measured in this process
+    independent = path.endswith('-independent.py')
+    elapsed, played, finished, latencies, errors = (independent_games if independent else api_games)(path, games, seed, plies)
+    latencies = np.array(latencies or [0]) / 1000
+    return {
+        'kind': 'independent' if independent else 'api',
+        'games': games,
+        'finished': finished,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'plies': played,
+        'seconds': elapsed,
+        'games_per_sec': games / elapsed if elapsed else 0.0,
+        'plies_per_sec': played / elapsed if elapsed else 0.0,
+        'p50_us': float(np.percentile(latencies, 50)),
+        'p99_us': float(np.percentile(latencies, 99)),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Lines describing every compared field that moved the wrong way by more
+    # than tolerance
+    regressions = []
+    for label, result in sorted(results.items()):
+        before = baseline.get(label)
+        if before is None:
+            continue
+        for field, higher in COMPARED.items():
+            old, new = before[field], result[field]
+            worse = new < old * (1 - tolerance) if higher else new > old * (1 + tolerance)
+            if old and worse:
+                regressions.append(f'{label}: {field} {old:.1f} -> {new:.1f}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays seeded random games with every script under Results and reports their speed.')
+    parser.add_argument('--name', default='*', help='only scripts of this game, e.g. daisy or daisy-adapted')
+    parser.add_argument('--model', default='*', help='only scripts from this Results directory')
+    parser.add_argument('--games', type=int, default=20, help='games per script')
+    parser.add_argument('--plies', type=int, default=500, help='longest game')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=600, help='seconds per script')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='compare with a report written earlier by --json')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='change against the baseline reported as a regression')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(REPORT + json.dumps(measure(args.worker, args.games, args.seed, args.plies)))
+        return
+
+    # Every script runs in a fresh interpreter, so that peak RSS and any
+    # state a script leaves behind are its own
+    results, errors, unadapted = {}, {}, []
+    for path in sorted(glob.glob(os.path.join(RESULTS, args.model, f'{args.name}.py'))):
+        label = os.path.relpath(path, RESULTS)[:-3]
+        # -independent scripts can only be replayed through an adapter
+        if label.endswith('-independent') and label not in REPLAYS:
+            unadapted.append(label)
+            continue
+        command = [sys.executable, os.path.abspath(__file__), '--worker', path,
+                   '--games', str(args.games), '--seed', str(args.seed), '--plies', str(args.plies)]
+        try:
+            done = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout)
+            if done.returncode:
+                errors[label] = done.stderr.strip().splitlines()[-1] if done.stderr.strip() else f'exit {done.returncode}'
+            else:
+                report = done.stdout[done.stdout.rindex(REPORT) + len(REPORT):]
+                results[label] = json.loads(report.splitlines()[0])
+        except subprocess.TimeoutExpired:
+            errors[label] = f'over {args.timeout:.0f}s'
+
+    print(f'{"script":<32}{"games/s":>9}{"plies/s":>10}{"p50 us":>10}{"p99 us":>10}{"RSS MB":>8}{"finished":>10}{"errors":>8}')
+    for label, result in sorted(results.items(), key=lambda item: -item[1]['plies_per_sec']):
+        print(f'{label:<32}{result["games_per_sec"]:>9.1f}{result["plies_per_sec"]:>10.0f}{result["p50_us"]:>10.0f}'
+              f'{result["p99_us"]:>10.0f}{result["peak_rss_mb"]:>8.0f}{result["finished"]:>7}/{result["games"]:<3}{result["errors"]:>7}')
+    if unadapted:
+        print(f'No entry in implementations.REPLAYS: {", ".join(unadapted)}')
+    for label, error in errors.items():
+        print(f'{label}: stopped by {error}')
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        settings = [name for name in ('games', 'plies', 'seed') if baseline[name] != getattr(args, name)]
+        if settings:
+            print(f'The baseline was run with other {", ".join(settings)}; figures may not be comparable')
+        regressions = compare(results, baseline['results'], args.tolerance)
+        for line in regressions:
+            print(line)
+
+    if args.json:
+        report = {'python': platform.python_version(), 'games': args.games, 'plies': args.plies, 'seed': args.seed,
+                  'results': results, 'errors': errors}
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game import Profiler, PROFILED
+from implementations import implementations, load_game, playout
+
+
+def record(game, rng, games, plies):
+    # Moves of random games, chosen before any profiling so the validate_move
+    # calls of legal_moves are not timed
+    recorded = []
+    for _ in range(games):
+        game.reset()
+        moves, _, _ = playout(game, rng, plies)
+        recorded.append(moves)
+    return recorded
+
+
+def replay(game, recorded):
+    # Plays the recorded games through step, each from the initial position
+    for moves in recorded:
+        game.reset()
+        for move in moves:
+            game.step(move)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profiles the lifecycle methods of every implementation replaying random games.')
+    parser.add_argument('--name', default='*', help='only implementations of this game')
+    parser.add_argument('--model', default='*', help='only implementations from this Results directory')
+    parser.add_argument('--games', type=int, default=3)
+    parser.add_argument('--plies', type=int, default=200, help='longest playout')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the summaries to this file')
+    args = parser.parse_args()
+
+    profiler = Profiler()
+    errors = {}
+    for path in implementations(args.name, args.model):
+        label = os.path.relpath(path, os.path.join(ROOT, 'Results'))
+        rng = np.random.default_rng(args.seed)
+        try:
+            game = load_game(path)
+            recorded = record(game, rng, args.games, args.plies)
+            game.profile(profiler, label)
+            replay(game, recorded)
+        except Exception as e:
+            errors[label] = f'{type(e).__name__}: {e}'
+
+    summary = profiler.summary()
+    ranked = sorted(summary.items(), key=lambda item: -sum(m['ns_per_ply'] for m in item[1].values()))
+    print(f'{"implementation":<32}' + ''.join(f'{name:>15}' for name in PROFILED) + '   (us per ply)')
+    for label, methods in ranked:
+        cells = [methods.get(name, {}).get('ns_per_ply', 0) / 1000 for name in PROFILED]
+        print(f'{label:<32}' + ''.join(f'{cell:15.1f}' for cell in cells))
+    for label, error in errors.items():
+        print(f'{label}: stopped by {error}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'summary': summary, 'errors': errors}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
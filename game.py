@@ -0,0 +1,1679 @@
+import io
+import re
+import string
+import struct
+import sys
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+from copy import deepcopy
+from enum import Enum
+from functools import lru_cache, wraps
+from math import log10
+from time import perf_counter_ns
+
+
+class _LazyNumpy:
+    # Stands in for numpy until it is first needed, which is when the first
+    # board is built; importing game alone stays cheap
+    def __getattr__(self, name):
+        global np
+        import numpy
+        np = numpy
+        return getattr(numpy, name)
+
+np = _LazyNumpy()
+
+
+class Game:
+    def __init__(self, board):
+        self.board = board
+        self.round = 1
+        self.current_player = self.initial_player()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if '__init__' in cls.__dict__:
+            cls.__init__ = _records_initial_state(cls.__init__)
+        if 'get_state' in cls.__dict__:
+            cls.get_state = _snapshotting(cls.get_state)
+
+
+    def game_loop(self):
+        while True:
+            print(self.board)
+
+            valid = False
+            while not valid:
+                move = _as_move(self.prompt_current_player())
+                valid = self.validate_move(move)
+
+            self.perform_move(move)
+
+            if self.game_finished():
+                print(f'\n{self.board}')
+                winner = self.get_winner()
+                self.finish_message(winner)
+                return winner
+
+            self.current_player = self.next_player()
+            self.round = self.round_counter()
+
+    @property
+    def to_play(self):
+        return self.current_player
+
+    def reset(self):
+        # Restores the position the game was constructed with, including any
+        # attributes set up by the subclass' own __init__. Settings made on the
+        # instance (profiling, quiet, record_extra) carry over
+        initial = self.__dict__['_initial_state']
+        kept = {name: self.__dict__[name] for name in _KEPT if name in self.__dict__}
+        self.__dict__.clear()
+        self.__dict__.update(deepcopy(initial, {id(self): self}))
+        self._initial_state = initial
+        self.__dict__.update(kept)
+
+    def step(self, move):
+        # Headless counterpart of one game_loop iteration: anything the subclass
+        # prints is discarded and input() raises EOFError instead of blocking.
+        # Returns (accepted, finished, winner), and leaves why a move was not
+        # accepted in self.rejection, as check() does
+        self.rejection = None
+        if self.__dict__.get('_outcome') is not None:
+            return False, True, self._outcome[0]
+
+        move = _as_move(move)
+        if not self._validate(move):
+            return False, False, None
+
+        with _headless(), self._quietly():
+            self.perform_move(move)
+
+            if self.game_finished():
+                winner = self.get_winner()
+                self._outcome = (winner,)
+                return True, True, winner
+
+            self.current_player = self.next_player()
+            self.round = self.round_counter()
+
+        return True, False, None
+
+
+    # In quiet mode validate_move records why it rejects a move in
+    # self.rejection instead of printing it
+    quiet = False
+
+    def check(self, move):
+        # Quiet validate_move: None for a valid move, otherwise a Rejected whose
+        # message is only formatted when asked for. Whatever the subclass prints
+        # while validating is kept, unformatted, as the message of a RULES
+        # rejection
+        return None if self._validate(_as_move(move)) else self.rejection
+
+    def _validate(self, move):
+        # validate_move, quiet and headless. A rejection the subclass gives
+        # without _reject is recorded as RULES, with whatever it printed
+        self.rejection = None
+        transcript = []
+        with _headless(transcript), self._quietly():
+            if self.validate_move(move):
+                return True
+        if self.rejection is None:
+            self.rejection = Rejected(Rejection.RULES, move, transcript)
+        return False
+
+    @contextmanager
+    def _quietly(self):
+        quiet = self.__dict__.get('quiet')
+        self.quiet = True
+        try:
+            yield
+        finally:
+            if quiet is None:
+                del self.quiet
+            else:
+                self.quiet = quiet
+
+    def _reject(self, reason, move, *details):
+        self.rejection = Rejected(reason, move, details)
+        if not self.quiet:
+            print(self.rejection.message)
+        return False
+
+
+    def profile(self, profiler, label=None):
+        # Times the lifecycle methods of this game into profiler, under label
+        # or the class name, until called again with None. The game is moved
+        # onto a subclass wrapping them, so the implementation is untouched
+        if profiler is None:
+            self.__class__ = getattr(type(self), '_unprofiled', type(self))
+            self.__dict__.pop('_profile', None)
+            return
+        self.__class__ = _profiled(getattr(type(self), '_unprofiled', type(self)))
+        self._profile = [profiler, label or type(self).__qualname__, 0]
+
+
+    def memo(self, key, compute, *args):
+        # compute(*args), computed once per position: results are kept under
+        # key until the board next changes. The key has to capture whatever
+        # else the result depends on, such as the player it is computed for
+        stamp = (id(self.board), self.board.version)
+        memo = self.__dict__.get('_memo')
+        if memo is None or memo[0] != stamp:
+            memo = self._memo = (stamp, {})
+        try:
+            return memo[1][key]
+        except KeyError:
+            value = memo[1][key] = compute(*args)
+            return value
+        except TypeError:
+            return compute(*args)
+
+
+    def legal_moves(self):
+        # Every move validate_move accepts in the current position, as a tuple
+        # of Moves in candidate_moves order, or failing those the captures
+        # _captures finds; none once the game is over. Kept per position_hash
+        # and round rather than through memo, so a position reached again
+        # after undo_to or by another order of moves is not validated twice.
+        # reset starts the cache afresh, and so does reaching MOVE_CACHE_LIMIT
+        # positions
+        if self.__dict__.get('_outcome') is not None:
+            return ()
+        key = (self.position_hash(), self.__dict__.get('round'))
+        cache = self.__dict__.get('_legal')
+        if cache is None:
+            cache = self._legal = {}
+        moves = cache.get(key)
+        if moves is None:
+            moves = tuple(self._accepted(self.candidate_moves()))
+            if not moves:
+                moves = tuple(self._accepted(self._captures()))
+            if len(cache) >= MOVE_CACHE_LIMIT:
+                cache.clear()
+            cache[key] = moves
+        return moves
+
+    def _accepted(self, candidates):
+        # The candidates validate_move accepts. A move is only rejected by a
+        # falsy return; anything validate_move raises propagates, as from step
+        with _headless(), self._quietly():
+            for move in candidates:
+                if self.validate_move(move):
+                    yield move
+
+    def candidate_moves(self):
+        # Well formed moves worth validating, for legal_moves: the current
+        # player's pieces placed on blank cells and moved from their cells to
+        # any other. Pieces are tied to players through attributes keyed by
+        # player, such as {0: 'A', 1: 'V'} or reserves like {0: {'A': 2}},
+        # which also rule out pieces with none left; pieces no attribute ties
+        # to a player are placed for everyone, and moved by everyone unless
+        # an attribute names the current player's own. Games that can list
+        # their moves directly override this or legal_moves
+        pieces, theirs, mine = self._placeable()
+        board, geometry = self.board, self.board.geometry
+        rows = [row[0] for row in board._render()]
+        blank = [(x, y) for x, y in geometry.cells if rows[x][y] == board.BLANK]
+        if mine:
+            origins = [(x, y) for x, y in geometry.cells if rows[x][y] in mine]
+        else:
+            origins = [(x, y) for x, y in geometry.cells if rows[x][y] not in (board.BLANK, board.NULL) and rows[x][y] not in theirs]
+        moves = []
+        for piece in pieces:
+            placements = geometry.placements(piece)
+            moves += [placements[x][y] for x, y in blank]
+        for x, y in origins:
+            moves += geometry.movements(x, y)
+        return moves
+
+    def _captures(self):
+        # The current player's pieces placed onto occupied cells, which
+        # legal_moves only tries when nothing else is legal: some games take
+        # a piece by naming its cell, like Topaz after a line of three
+        pieces, _, _ = self._placeable()
+        board, geometry = self.board, self.board.geometry
+        rows = [row[0] for row in board._render()]
+        occupied = [(x, y) for x, y in geometry.cells if rows[x][y] not in (board.BLANK, board.NULL)]
+        moves = []
+        for piece in pieces:
+            placements = geometry.placements(piece)
+            moves += [placements[x][y] for x, y in occupied]
+        return moves
+
+    def _placeable(self):
+        # Pieces the current player may place, and the pieces of the others
+        player = _key(self.current_player)
+        owned, reserves = _owners(self)
+        theirs = set().union(*[pieces for key, pieces in owned.items() if key != player]) - owned.get(player, set())
+        left = reserves.get(player)
+        return sorted(piece for piece in _pieces(self) - theirs if left is None or left.get(piece, 1) > 0), theirs, owned.get(player)
+
+
+    # Bytes given to the current player and get_state's extra values in a
+    # to_bytes record. None sizes them for each game, from what its initial
+    # position needs with room for the extra state to double and then some
+    record_extra = None
+
+    def to_bytes(self):
+        # Fixed-width record of get_state(): one Latin-1 byte per cell that is
+        # not NULL, then the current player and the extra values, padded to
+        # record_extra bytes. Enum members are stored as their values
+        layout, tail = _packed_state(self.get_state())
+        cells = np.asarray(layout)[~self.board.geometry.null_mask].tolist()
+        extra = self._record_extra()
+        if len(tail) > extra:
+            raise ValueError(f'State needs {len(tail)} bytes past the board, more than the {extra} of record_extra.')
+        return ''.join(cells).encode('latin-1') + tail.ljust(extra, b'\0')
+
+    def _record_extra(self):
+        if self.record_extra is None:
+            # The position reset returns to, set up the way reset does it
+            initial = object.__new__(type(self))
+            initial.__dict__.update(deepcopy(self.__dict__['_initial_state'], {id(self): initial}))
+            _, tail = _packed_state(initial.get_state())
+            self.record_extra = 2 * len(tail) + 32
+        return self.record_extra
+
+    def from_bytes(self, data):
+        # State unpacked from a to_bytes record of a game played on a board
+        # like this one, NULL cells included
+        valid = ~self.board.geometry.null_mask
+        cells = int(valid.sum())
+        layout = np.full(valid.shape, self.board.NULL, dtype='<U1')
+        layout[valid] = list(bytes(data[:cells]).decode('latin-1'))
+        layout.flags.writeable = False
+        (player, extra), _ = _unpack(memoryview(data), cells)
+        return State(layout, player, extra)
+
+    @property
+    def record_size(self):
+        return len(self.board.geometry.cells) + self._record_extra()
+
+
+    # Attributes folded into position_hash besides the board and the side to
+    # move. None means every attribute mark would save except the round counter
+    hashed_attributes = None
+
+    def position_hash(self):
+        names = self.hashed_attributes
+        if names is None:
+            names = [name for name in self.__dict__ if name not in _UNTRACKED and name not in ('round', 'current_player')]
+
+        key = self.board.zobrist ^ _state_key('current_player', self.current_player)
+        for name in names:
+            key ^= _state_key(name, getattr(self, name, None))
+        return key
+
+    def track(self, *names):
+        # Limits what mark/undo_to save besides the board to the given
+        # attributes; by default every attribute of the game is saved
+        self._tracked = names
+
+    def mark(self):
+        # Immutable values are saved as they are; only the rest is deep copied
+        names = self.__dict__.get('_tracked') or [name for name in self.__dict__ if name not in _UNTRACKED]
+        return self.board.mark(), _saved({name: self.__dict__[name] for name in names if name in self.__dict__}, self)
+
+    def undo_to(self, mark):
+        # Rolls the board back through its journal and restores the attributes
+        # saved by mark, which can be undone to any number of times
+        position, attributes = mark
+        self.board.undo_to(position)
+        if '_tracked' not in self.__dict__:
+            for name in [name for name in self.__dict__ if name not in _UNTRACKED and name not in attributes]:
+                del self.__dict__[name]
+        self.__dict__.update(_saved(attributes, self))
+
+
+    def prompt_current_player(self):
+        return input('Your move: ')
+
+    def get_state(self):
+        return State(self.board.snapshot(), self.current_player, [])
+
+    def perform_move(self, move):
+        if is_placement(move):
+            self.board.place_piece(move)
+        else:
+            self.board.move_piece(move)
+
+    def finish_message(self, winner):
+        if winner is None:
+            print("Game over. It's a tie!")
+        else:
+            print(f'Player {winner} wins!')
+
+    def round_counter(self):
+        return self.round + 1
+
+    def initial_player(self):
+        return 0
+
+
+    def validate_move(self, move):
+        # Checks if the move is correctly formatted
+        move = parse_move(move)
+        if not (move.placement or move.movement):
+            return self._reject(Rejection.MALFORMED, move)
+
+        # Bounds as numpy indexing sees them, negative indices included
+        height, width = self.board.height, self.board.width
+        for x, y in move.positions:
+            if not (-height <= x < height and -width <= y < width):
+                return self._reject(Rejection.OFF_BOARD, move, (x, y))
+
+        return True
+
+
+    def game_finished(self):
+        return None
+
+    def get_winner(self):
+        return None
+
+    def next_player(self):
+        return None
+
+
+# Game attributes that mark/undo_to never save or restore, and those of them
+# that reset leaves alone
+_KEPT = ('_profile', 'quiet', 'record_extra')
+_UNTRACKED = {'board', '_initial_state', '_tracked', 'quiet', 'rejection', '_profile', '_memo', 'record_extra', '_legal'}
+
+
+# Tags of the values _pack writes. 0 stands for None so zero padding reads as
+# nothing rather than as garbage
+_NONE, _FALSE, _TRUE, _SMALL, _INT, _FLOAT, _STR, _TUPLE, _LIST, _DICT, _SET = range(11)
+
+def _packed_state(state):
+    # The layout of a get_state() result, and its player and extra values
+    # packed. Overrides returning just (layout, current_player) have no extra
+    layout, player, *extra = state
+    return layout, _pack((player, list(extra[0] if extra else [])))
+
+def _pack(value):
+    if isinstance(value, Enum):
+        value = value.value
+    if value is None:
+        return bytes([_NONE])
+    if isinstance(value, (bool, np.bool_)):
+        return bytes([_TRUE if value else _FALSE])
+    if isinstance(value, (int, np.integer)):
+        value = int(value)
+        return struct.pack('<Bb', _SMALL, value) if -128 <= value < 128 else struct.pack('<Bq', _INT, value)
+    if isinstance(value, (float, np.floating)):
+        return struct.pack('<Bd', _FLOAT, value)
+    if isinstance(value, str):
+        text = value.encode('utf-8')
+        return struct.pack('<BH', _STR, _length(len(text))) + text
+
+    for tag, kind in ((_TUPLE, tuple), (_LIST, list), (_SET, (set, frozenset)), (_DICT, dict)):
+        if isinstance(value, kind):
+            items = [item for pair in value.items() for item in pair] if tag == _DICT else list(value)
+            if tag == _SET:
+                items.sort(key=repr)
+            return struct.pack('<BH', tag, _length(len(value))) + b''.join(map(_pack, items))
+    raise TypeError(f'Cannot pack {type(value).__name__} values.')
+
+def _length(size):
+    if size > 0xFFFF:
+        raise ValueError(f'Cannot pack a string or collection of {size} items; the limit is {0xFFFF}.')
+    return size
+
+def _unpack(data, offset):
+    # The value packed at data[offset:] and the offset just past it
+    tag = data[offset]
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag in (_FALSE, _TRUE):
+        return tag == _TRUE, offset
+    if tag == _SMALL:
+        return struct.unpack_from('<b', data, offset)[0], offset + 1
+    if tag == _INT:
+        return struct.unpack_from('<q', data, offset)[0], offset + 8
+    if tag == _FLOAT:
+        return struct.unpack_from('<d', data, offset)[0], offset + 8
+    if tag == _STR:
+        size, = struct.unpack_from('<H', data, offset)
+        return bytes(data[offset + 2:offset + 2 + size]).decode('utf-8'), offset + 2 + size
+
+    count, = struct.unpack_from('<H', data, offset)
+    offset += 2
+    items = []
+    for _ in range(count * 2 if tag == _DICT else count):
+        item, offset = _unpack(data, offset)
+        items.append(item)
+    if tag == _DICT:
+        return dict(zip(items[::2], items[1::2])), offset
+    return {_TUPLE: tuple, _LIST: list, _SET: set}[tag](items), offset
+
+
+def per_position(*attributes):
+    # Decorator for Game methods whose result only depends on the position:
+    # it is computed once while the board is unchanged, per set of arguments
+    # and values of the named attributes (current_player when none are named)
+    if len(attributes) == 1 and callable(attributes[0]):
+        return per_position()(attributes[0])
+    attributes = attributes or ('current_player',)
+
+    def decorate(method):
+        @wraps(method)
+        def cached(self, *args):
+            key = (method.__name__, args, *[getattr(self, name, None) for name in attributes])
+            return self.memo(key, method, self, *args)
+
+        return cached
+
+    return decorate
+
+
+def _key(player):
+    # Players are compared by value, as games mix Enum members and their
+    # values in current_player and in the keys of their attributes
+    return getattr(player, 'value', player)
+
+def _attributes(game):
+    # Values of the game's own attributes and its classes', board aside
+    values = [value for name, value in vars(game).items() if name not in _UNTRACKED]
+    for cls in type(game).__mro__:
+        if cls is Game:
+            break
+        values += [value for name, value in vars(cls).items() if not name.startswith('__') and not callable(value)]
+    return values
+
+def _pieces(game):
+    # Single characters on the board, anywhere in the game's attributes or
+    # among the letters and digits its validate_move compares moves with
+    board = game.board
+    found = {char for row in board._render() for char in row[0]} | _rule_pieces(type(game))
+    values, seen = _attributes(game), set()
+    while values:
+        value = values.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, str):
+            if len(value) == 1:
+                found.add(value)
+        elif isinstance(value, Enum):
+            values.append(value.value)
+        elif isinstance(value, dict):
+            values += [*value.keys(), *value.values()]
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            values += value
+    return found - {board.BLANK, board.NULL, ' ', '\n'}
+
+@lru_cache(maxsize=None)
+def _rule_pieces(cls):
+    # Pieces that only turn up once the game is under way, such as shots or
+    # crowned pieces, or that the game never names outside its rules: the
+    # letters and digits its validate_move compares with. Failing those, the
+    # ones anywhere in its script, and failing those too, every letter and
+    # digit. Methods are looked at past the wrappers Game and profiling add
+    bases = cls.__mro__[:cls.__mro__.index(Game)]
+    methods = [_unwrap(value) for base in bases for value in vars(base).values() if callable(value)]
+    found = _named_chars(method for method in methods if getattr(method, '__name__', None) == 'validate_move')
+    if not found:
+        scripts = {id(method.__globals__): method.__globals__ for method in methods if hasattr(method, '__globals__')}
+        found = _named_chars(function for namespace in scripts.values() for member in list(namespace.values())
+                             for function in (vars(member).values() if isinstance(member, type) else [member])
+                             if getattr(_unwrap(function) if callable(function) else None, '__globals__', None) is namespace)
+    return frozenset(found or string.ascii_letters + string.digits)
+
+def _unwrap(function):
+    # inspect.unwrap without importing inspect, which takes about as long as
+    # the rest of import game
+    for _ in range(sys.getrecursionlimit()):
+        if not hasattr(function, '__wrapped__'):
+            return function
+        function = function.__wrapped__
+    raise ValueError(f'wrapper loop when unwrapping {function!r}')
+
+def _named_chars(functions):
+    # Single letters and digits among the constants of the functions given
+    # and of the functions nested in them
+    found, codes = set(), [_unwrap(function).__code__ for function in functions]
+    while codes:
+        code = codes.pop()
+        for const in code.co_consts:
+            if isinstance(const, str) and len(const) == 1 and const.isalnum():
+                found.add(const)
+            elif hasattr(const, 'co_consts'):
+                codes.append(const)
+    return found
+
+def _owners(game):
+    # Pieces per player key, from attributes keyed by the players whose
+    # values all name pieces, and piece counts per player key, from those
+    # whose values all map pieces to numbers
+    owned, reserves = {}, {}
+    player = _key(game.current_player)
+    for value in _attributes(game):
+        if not isinstance(value, dict) or player not in map(_key, value):
+            continue
+        entries = [(_key(key), _piece_set(pieces)) for key, pieces in value.items()]
+        if any(pieces is None for _, pieces in entries):
+            continue
+        for key, pieces in entries:
+            owned.setdefault(key, set()).update(pieces)
+        for key, counts in value.items():
+            if isinstance(counts, dict) and all(isinstance(count, int) for count in counts.values()):
+                reserves[_key(key)] = counts
+    return owned, reserves
+
+def _piece_set(value):
+    # The pieces a value names: a character, characters or a dict keyed by
+    # them; None for anything else
+    value = _key(value)
+    if isinstance(value, str):
+        return {value} if len(value) == 1 else None
+    if isinstance(value, (dict, list, tuple, set, frozenset)) and value:
+        pieces = {_key(piece) for piece in value}
+        return pieces if all(isinstance(piece, str) and len(piece) == 1 for piece in pieces) else None
+    return None
+
+
+PROFILED = ('validate_move', 'perform_move', 'game_finished', 'get_winner', 'next_player', 'get_state')
+
+class Profiler:
+    # Collects timings from games handed to Game.profile. Every call is kept as
+    # a (label, ply, method, nanoseconds) event in a ring buffer holding the
+    # latest size calls, and running totals per label and method are kept for
+    # the summaries. Calls made from inside another timed method, such as
+    # validate_move from game_finished, are recorded on their own as well
+    def __init__(self, size=1 << 16):
+        self.size = size
+        self.events = [None] * size
+        self.count = 0
+        self.totals = {}
+
+    def record(self, label, ply, method, elapsed):
+        self.events[self.count % self.size] = (label, ply, method, elapsed)
+        self.count += 1
+        total = self.totals.get((label, method))
+        if total is None:
+            total = self.totals[label, method] = [0, 0]
+        total[0] += 1
+        total[1] += elapsed
+
+    def recent(self):
+        # Buffered events, oldest first
+        if self.count <= self.size:
+            return self.events[:self.count]
+        start = self.count % self.size
+        return self.events[start:] + self.events[:start]
+
+    def summary(self):
+        # {label: {method: {calls, ns, calls_per_ply, ns_per_ply}}}, plies being
+        # the perform_move calls seen for the label
+        summary = {}
+        for (label, method), (calls, elapsed) in self.totals.items():
+            plies = max(self.totals.get((label, 'perform_move'), (1,))[0], 1)
+            summary.setdefault(label, {})[method] = {
+                'calls': calls, 'ns': elapsed, 'calls_per_ply': calls / plies, 'ns_per_ply': elapsed / plies,
+            }
+        return summary
+
+
+_profiled_types = {}
+
+def _profiled(cls):
+    profiled = _profiled_types.get(cls)
+    if profiled is None:
+        methods = {name: _timed(getattr(cls, name), name) for name in PROFILED}
+        profiled = _profiled_types[cls] = type(cls.__name__, (cls,), {
+            '__module__': cls.__module__, '__qualname__': cls.__qualname__, '_unprofiled': cls, **methods,
+        })
+    return profiled
+
+def _timed(method, name):
+    @wraps(method)
+    def timed(self, *args, **kwargs):
+        profile = self.__dict__.get('_profile')
+        if profile is None:
+            return method(self, *args, **kwargs)
+
+        start = perf_counter_ns()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profile[0].record(profile[1], profile[2], name, perf_counter_ns() - start)
+            if name == 'perform_move':
+                profile[2] += 1
+
+    return timed
+
+
+class Rejection(Enum):
+    MALFORMED = 1
+    OFF_BOARD = 2
+    RULES = 3  # turned down by the subclass' own checks
+
+_REJECTION_MESSAGES = {
+    Rejection.MALFORMED: 'This move is incorrectly formatted. Try again.',
+    Rejection.OFF_BOARD: 'The position {} is not on the board. Try again.',
+}
+
+class Rejected(namedtuple('Rejected', 'reason move details', defaults=[()])):
+    __slots__ = ()
+
+    @property
+    def code(self):
+        return self.reason.value
+
+    @property
+    def message(self):
+        if self.reason is Rejection.RULES:
+            return ''.join(self.details).strip() or None
+        return _REJECTION_MESSAGES[self.reason].format(*self.details)
+
+
+_IMMUTABLE = (type(None), bool, int, float, complex, str, bytes, Enum)
+
+def _saved(attributes, game):
+    # Copy of attributes that shares their immutable values and deep copies
+    # the others, with references to the game left pointing at it
+    memo = {id(game): game}
+    return {name: _copied(value, memo) for name, value in attributes.items()}
+
+def _copied(value, memo):
+    # What deepcopy gives for the values games keep most, without its
+    # dispatch per item: immutable values, also tuples and frozensets of
+    # them, as they are, and lists, sets and dicts of them copied shallowly
+    if _immutable(value):
+        return value
+    kind = type(value)
+    if kind is list or kind is set or kind is dict:
+        if id(value) in memo:
+            return memo[id(value)]
+        if all(map(_immutable, value)) and (kind is not dict or all(map(_immutable, value.values()))):
+            memo[id(value)] = copy = value.copy()
+            return copy
+    return deepcopy(value, memo)
+
+def _immutable(value):
+    if isinstance(value, _IMMUTABLE):
+        return True
+    kind = type(value)
+    return (kind is tuple or kind is frozenset) and all(map(_immutable, value))
+
+
+class State(namedtuple('State', 'layout current_player extra')):
+    # What the base get_state returns. The layout is a read-only snapshot
+    # sharing the board's buffer until the board is next written to; extra
+    # holds the subclass' additional parameters. Overrides may still return a
+    # plain (layout, current_player) pair
+    __slots__ = ()
+
+
+def _records_initial_state(init):
+    @wraps(init)
+    def __init__(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        # Only the most derived __init__ sees the fully constructed game
+        if type(self).__init__ is __init__:
+            self.__dict__.pop('_initial_state', None)
+            self._initial_state = deepcopy(self.__dict__, {id(self): self})
+
+    return __init__
+
+Game.__init__ = _records_initial_state(Game.__init__)
+
+
+# Depth of get_state calls in progress. Only while it is above zero does a deep
+# copy of a board's layout return the board's snapshot; anywhere else it is an
+# independent, writable copy
+_getting_state = 0
+
+def _snapshotting(get_state):
+    @wraps(get_state)
+    def wrapper(self, *args, **kwargs):
+        global _getting_state
+        _getting_state += 1
+        try:
+            return get_state(self, *args, **kwargs)
+        finally:
+            _getting_state -= 1
+
+    return wrapper
+
+
+class _Headless:
+    def __init__(self, transcript=None):
+        self.transcript = transcript
+
+    def write(self, text):
+        if self.transcript is not None:
+            self.transcript.append(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def readline(self, size=-1):
+        return ''
+
+_HEADLESS = _Headless()
+
+@contextmanager
+def _headless(transcript=None):
+    # Swaps in a sink for stdin and stdout that discards output, or appends it
+    # to transcript when one is given
+    stdin, stdout = sys.stdin, sys.stdout
+    sys.stdin = sys.stdout = _HEADLESS if transcript is None else _Headless(transcript)
+    try:
+        yield
+    finally:
+        sys.stdin, sys.stdout = stdin, stdout
+
+
+@contextmanager
+def scripted_input(moves):
+    # Answers input() with the given moves in order, e.g. those read by
+    # load_script; once they run out input() raises EOFError
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(''.join(f'{move}\n' for move in moves))
+    try:
+        yield
+    finally:
+        sys.stdin = stdin
+
+def load_script(path):
+    # Moves listed one per line in a text file, blank lines skipped
+    with open(path, encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+PLACEMENT = re.compile(r'.\s+\d+\s*,\s*\d+')
+MOVEMENT = re.compile(r'\d+\s*,\s*\d+\s+\d+\s*,\s*\d+')
+COORDINATES = re.compile(r'\d+\s*,\s*\d+')
+
+class Move(str):
+    # A move string parsed once. It compares, hashes and formats exactly like
+    # the text it came from, so subclasses can keep treating moves as strings
+    def __new__(cls, text):
+        move = super().__new__(cls, text)
+        placement, movement = bool(PLACEMENT.fullmatch(text)), False
+        if placement:
+            text = re.sub(r'\s', '', text)
+            elements = text[0], tuple(map(int, text[1:].split(',')))
+            piece, positions = elements[0], (elements[1],)
+        elif movement := bool(MOVEMENT.fullmatch(text)):
+            elements = tuple(tuple(map(int, m.split(','))) for m in COORDINATES.findall(text))
+            piece, positions = None, elements
+        else:
+            elements, piece, positions = None, None, ()
+
+        move.__dict__.update(placement=placement, movement=movement, elements=elements,
+                             piece=piece, positions=positions)
+        return move
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Move is immutable')
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return parse_move, (str(self),)
+
+    def __repr__(self):
+        return f'Move({str.__repr__(self)})'
+
+
+# Move strings seen so far. Over a fixed board shape the set of well formed
+# moves is finite, so in practice this fills up once and then only serves hits.
+# Past the limit it starts over, so arbitrary typed input cannot grow it
+# without bound
+_moves = {}
+MOVE_CACHE_LIMIT = 1 << 16
+
+def parse_move(move: str) -> Move:
+    if type(move) is Move:
+        return move
+
+    parsed = _moves.get(move)
+    if parsed is None:
+        parsed = Move(move)
+        if len(_moves) >= MOVE_CACHE_LIMIT:
+            _moves.clear()
+        _moves[str(move)] = parsed
+    return parsed
+
+def _as_move(move):
+    return parse_move(move) if isinstance(move, str) else move
+
+
+def is_placement(move: str) -> bool:
+    return parse_move(move).placement
+
+def is_movement(move: str) -> bool:
+    return parse_move(move).movement
+
+def get_move_elements(move: str) -> tuple[str, tuple[int, int]] | tuple[tuple[int, int], tuple[int, int]]:
+    return parse_move(move).elements
+
+class SymbolTable:
+    # Maps each piece symbol a game uses to a small integer code. Codes are
+    # handed out in order of first use, starting from the blank and null cells
+    def __init__(self, symbols='', blank=None, null=None):
+        self.chars = []
+        self.codes = {}
+        for char in [Board.BLANK if blank is None else blank, Board.NULL if null is None else null, *symbols]:
+            self.code(char)
+
+    def code(self, char):
+        code = self.codes.get(char)
+        if code is None:
+            code = len(self.chars)
+            if code > np.iinfo(np.int8).max:
+                raise ValueError('Too many distinct pieces for a compact board.')
+            self.chars.append(char)
+            self.codes[char] = code
+        return code
+
+    def encode(self, chars):
+        chars = np.asarray(chars, dtype=str)
+        unique, inverse = np.unique(chars, return_inverse=True)
+        table = np.array([self.code(char) for char in unique], dtype=np.int8)
+        return table[inverse].reshape(chars.shape)
+
+    def decode(self, codes):
+        return np.array(self.chars)[codes]
+
+
+class CodedLayout:
+    # Character view over a compact board's int8 codes. Reads and writes through
+    # layout[r][c] and layout[r, c] behave as they do on the character array
+    def __init__(self, codes, symbols, board=None):
+        self._codes = codes
+        self._symbols = symbols
+        self._board = board
+        self._rows = [_CodedRow(row, symbols, board) for row in codes]
+
+    @property
+    def shape(self):
+        return self._codes.shape
+
+    @property
+    def ndim(self):
+        return self._codes.ndim
+
+    @property
+    def size(self):
+        return self._codes.size
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __contains__(self, char):
+        return bool((self == char).any())
+
+    def __getitem__(self, key):
+        if type(key) is tuple and len(key) == 2:
+            try:
+                return self._symbols.chars[self._codes.item(key)]
+            except TypeError:
+                pass  # slices, masks and fancy keys
+        elif type(key) is int or isinstance(key, np.integer):
+            return self._rows[key]
+        codes = self._codes[key]
+        if isinstance(codes, np.integer):
+            return self._symbols.chars[codes]
+        return self._symbols.decode(codes)
+
+    def __setitem__(self, key, value):
+        _write_codes(self._codes, self._symbols, self._board, key, value)
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            return self._codes == self._symbols.codes.get(other, -1)
+        return np.asarray(self) == other
+
+    def __ne__(self, other):
+        return ~(self == other)
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        chars = self._symbols.decode(self._codes)
+        return chars if dtype is None else chars.astype(dtype)
+
+    def __deepcopy__(self, memo):
+        # Same contract as Layout.__deepcopy__
+        board = self._board
+        if _getting_state and board is not None and id(board) not in memo:
+            return board.snapshot()
+        return CodedLayout(self._codes.copy(), deepcopy(self._symbols, memo))
+
+    def copy(self):
+        return CodedLayout(self._codes.copy(), self._symbols)
+
+    def flatten(self):
+        return np.asarray(self).flatten()
+
+    ravel = flatten
+
+    def tolist(self):
+        return np.asarray(self).tolist()
+
+    def __repr__(self):
+        return f'CodedLayout({np.asarray(self)!r})'
+
+    def __str__(self):
+        return str(np.asarray(self))
+
+
+class _CodedRow:
+    def __init__(self, codes, symbols, board=None):
+        self._codes = codes
+        self._symbols = symbols
+        self._board = board
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __iter__(self):
+        chars = self._symbols.chars
+        return iter([chars[code] for code in self._codes.tolist()])
+
+    def __getitem__(self, key):
+        if type(key) is int or isinstance(key, np.integer):
+            return self._symbols.chars[self._codes.item(key)]
+        return self._symbols.decode(self._codes[key])
+
+    def __setitem__(self, key, value):
+        _write_codes(self._codes, self._symbols, self._board, key, value)
+
+    def __contains__(self, char):
+        code = self._symbols.codes.get(char)
+        return code is not None and bool((self._codes == code).any())
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            return self._codes == self._symbols.codes.get(other, -1)
+        return np.asarray(self) == other
+
+    def __ne__(self, other):
+        return ~(self == other)
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        chars = self._symbols.decode(self._codes)
+        return chars if dtype is None else chars.astype(dtype)
+
+    def tolist(self):
+        return list(self)
+
+
+def _owner(layout):
+    if isinstance(layout, np.ndarray):
+        layout = layout if layout.base is None else layout.base
+    return getattr(layout, '_board', None)
+
+def _report(layout, cells):
+    board = _owner(layout)
+    counter = None if board is None else board._counter
+    if counter is not None and cells:
+        counter.read(cells)
+
+def _reading(method, cells):
+    # Wraps a layout method to report the cells it hands out, as counted by
+    # cells(layout, result), to the owning board's AccessCounter
+    @wraps(method)
+    def reading(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        _report(self, cells(self, result))
+        return result
+
+    return reading
+
+def _whole(layout, result):
+    return layout.size if hasattr(layout, 'size') else len(layout)
+
+def _delivered(layout, result):
+    # Cells handed out by indexing: rows and views are not reads themselves
+    if isinstance(result, _CodedRow):
+        return 0
+    if isinstance(result, np.ndarray):
+        return 0 if np.may_share_memory(result, getattr(layout, '_codes', layout)) else result.size
+    return 1
+
+
+class _CountedCodedLayout(CodedLayout):
+    # CodedLayout of a board counting its accesses
+    def __init__(self, codes, symbols, board=None):
+        super().__init__(codes, symbols, board)
+        for row in self._rows:
+            row.__class__ = _CountedCodedRow
+
+    __getitem__ = _reading(CodedLayout.__getitem__, _delivered)
+    __eq__ = _reading(CodedLayout.__eq__, _whole)
+    __array__ = _reading(CodedLayout.__array__, _whole)
+    __hash__ = None
+
+class _CountedCodedRow(_CodedRow):
+    __getitem__ = _reading(_CodedRow.__getitem__, _delivered)
+    __iter__ = _reading(_CodedRow.__iter__, _whole)
+    __contains__ = _reading(_CodedRow.__contains__, _whole)
+    __eq__ = _reading(_CodedRow.__eq__, _whole)
+    __array__ = _reading(_CodedRow.__array__, _whole)
+    __hash__ = None
+
+
+class AccessCounter:
+    # Cell reads and writes made on the boards handed to Board.count_accesses,
+    # by ply and by the function making them. Reads are the cells handed out
+    # through board.layout; whoever drives the game calls tick() between plies
+    def __init__(self):
+        self.ply = 0
+        self.reads = {}
+        self.writes = {}
+
+    def tick(self):
+        self.ply += 1
+
+    def read(self, cells=1):
+        key = (self.ply, _caller())
+        self.reads[key] = self.reads.get(key, 0) + cells
+
+    def write(self, cells=1):
+        key = (self.ply, _caller())
+        self.writes[key] = self.writes.get(key, 0) + cells
+
+    def summary(self):
+        # Totals, averages over the plies ticked so far, the busiest ply and
+        # the totals of every calling function
+        plies = max(self.ply, 1)
+        per_ply, callers = {}, {}
+        for kind, counts in (('reads', self.reads), ('writes', self.writes)):
+            for (ply, caller), cells in counts.items():
+                callers.setdefault(caller, {'reads': 0, 'writes': 0})[kind] += cells
+                if kind == 'reads':
+                    per_ply[ply] = per_ply.get(ply, 0) + cells
+        reads, writes = sum(self.reads.values()), sum(self.writes.values())
+        return {
+            'plies': self.ply, 'reads': reads, 'writes': writes,
+            'reads_per_ply': reads / plies, 'writes_per_ply': writes / plies,
+            'peak_reads': max(per_ply.values(), default=0), 'callers': callers,
+        }
+
+def _caller():
+    # Qualified name of the innermost function outside this module
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+
+
+def _write_codes(codes, symbols, board, key, value):
+    if board is not None:
+        board._write(codes, key, value)
+    elif isinstance(value, str):
+        codes[key] = symbols.code(value[:1])
+    else:
+        codes[key] = symbols.encode(value)
+
+
+def _layout_type():
+    # Layout subclasses numpy.ndarray, so it is only defined once numpy is
+    # imported. It then replaces the module __getattr__ lookup below
+    global Layout
+    if 'Layout' in globals():
+        return Layout
+
+    class Layout(np.ndarray):
+        # Character array of a board. Writes made through it, including through
+        # row views such as layout[r][c] = piece, are handed to the owning board
+        # so the board sees every mutation regardless of which code path made it
+        _row_views = None
+
+        def __iter__(self):
+            # Iterating over a board's own array hands out row views made once
+            # per buffer rather than a new view per row
+            rows = self._row_views
+            if rows is None:
+                if self.ndim != 2 or getattr(self, '_board', None) is None:
+                    return np.ndarray.__iter__(self)
+                rows = self._row_views = [np.ndarray.__getitem__(self, i) for i in range(len(self))]
+            return iter(rows)
+
+        def __setitem__(self, key, value):
+            root = self if self.base is None else self.base
+            board = getattr(root, '_board', None)
+            if board is None:
+                np.ndarray.__setitem__(self, key, value)
+            else:
+                board._write(self, key, value)
+
+        def __deepcopy__(self, memo):
+            # Inside get_state, a board's own layout deep copies to the board's
+            # read-only snapshot, so overrides that deepcopy it stay cheap.
+            # Anywhere else, and when the whole board is being copied, the
+            # copy is independent and writable
+            board = getattr(self, '_board', None)
+            if _getting_state and board is not None and id(board) not in memo:
+                return board.snapshot()
+            return self.copy()
+
+    Layout.__qualname__ = 'Layout'
+
+    global _CountedLayout
+
+    class _CountedLayout(Layout):
+        # Layout of a board counting its accesses
+        __getitem__ = _reading(Layout.__getitem__, _delivered)
+        tolist = _reading(Layout.tolist, _whole)
+        flatten = _reading(Layout.flatten, _whole)
+        ravel = _reading(Layout.ravel, _whole)
+
+        def __contains__(self, value):
+            _report(self, self.size)
+            return self.view(np.ndarray).__contains__(value)
+
+        def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+            for layout in inputs:
+                if isinstance(layout, _CountedLayout):
+                    _report(layout, layout.size)
+            inputs = [layout.view(np.ndarray) if isinstance(layout, Layout) else layout for layout in inputs]
+            return getattr(ufunc, method)(*inputs, **kwargs)
+
+    _CountedLayout.__qualname__ = '_CountedLayout'
+    return Layout
+
+def __getattr__(name):
+    if name in ('Layout', '_CountedLayout'):
+        _layout_type()
+        return globals()[name]
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+class Board:
+    BLANK = '_'
+    NULL = ' '
+
+    def __init__(self, shape, layout=None, compact=False, symbols=''):
+        # A compact board stores int8 codes from a per-board SymbolTable in
+        # self.codes and exposes them as characters through self.layout
+        self.compact = compact
+        self._counter = None
+        self.symbols = SymbolTable(symbols, self.BLANK, self.NULL)
+        if compact:
+            cells = np.full(shape, self.symbols.code(self.BLANK), dtype=np.int8)
+        else:
+            cells = _layout_type()(shape, dtype='<U1')
+            cells.fill(self.BLANK)
+        self._bind(cells)
+        self._journal = None
+        self._journal_start = 0
+        self._marks = None
+        self._null = self.symbols.code(self.NULL) if compact else self.NULL
+        self._geometry = None
+        self._rows = None
+        self.height, self.width = shape
+        self._zobrist = None
+        self._keys = _ZobristKeys(self.height * self.width, self.BLANK, self.symbols if compact else None)
+        self.version = 0
+
+        if layout:
+            try:
+                for i, row in enumerate(layout.split('\n')):
+                    for j, c in enumerate(row):
+                        self._set_cell(i, j, c)
+            except IndexError:
+                raise ValueError('Board layout does not match specified board shape.')
+
+    def _bind(self, cells):
+        # Makes cells the live storage: the Layout itself on a character board,
+        # the int8 code array behind a CodedLayout on a compact one
+        self._cells = cells
+        self._raw = cells.view(np.ndarray)
+        self._address = None
+        self._snapshot = None
+        counted = self.__dict__.get('_counter') is not None
+        if self.compact:
+            self._codes = cells
+            self.layout = (_CountedCodedLayout if counted else CodedLayout)(cells, self.symbols, self)
+        else:
+            _layout_type()
+            cells.__class__ = _CountedLayout if counted else Layout
+            cells._board = self
+            self.layout = cells
+
+    def count_accesses(self, counter):
+        # Reports every cell read through self.layout and every write to
+        # counter, an AccessCounter; None stops counting
+        self._counter = counter
+        self._bind(self._cells)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._bind(self._cells)
+
+    def snapshot(self):
+        # Read-only view of the current cells. The buffer is shared until the
+        # next write, which moves the board onto a private copy first; the
+        # snapshot keeps the old buffer and so never changes
+        if self._snapshot is None:
+            view = self._cells.view(np.ndarray)
+            view.flags.writeable = False
+            self._snapshot = CodedLayout(view, self.symbols) if self.compact else view
+        return self._snapshot
+
+    def _set_cell(self, x, y, piece):
+        # Every change to a cell ends up here
+        self._store(x, y, self.symbols.code(str(piece)[:1]) if self.compact else piece)
+
+    def _store(self, x, y, value):
+        if self._snapshot is not None:
+            self._bind(self._cells.copy())
+
+        old, new = self._put(x, y, value)
+        self.version += 1
+        if self._journal is not None:
+            self._journal.append(((x, y), old, new))
+        if self._counter is not None:
+            self._counter.write()
+
+    def _put(self, x, y, value):
+        # Writes one cell and, once the Zobrist key has been asked for, folds
+        # the change into it
+        cells = self._raw
+        old = cells.item(x, y)
+        cells[x, y] = value
+        new = cells.item(x, y)
+
+        if self._zobrist is not None:
+            keys = self._keys
+            cell = x % self.height * self.width + y % self.width
+            self._zobrist ^= keys[old][cell] ^ keys[new][cell]
+        if self._geometry is not None and self._null in (old, new):
+            self._geometry = None
+        if self._rows is not None:
+            self._rows[x % self.height] = None
+        return old, new
+
+    @property
+    def zobrist(self):
+        # 64-bit key of the cells, computed when first asked for and kept up
+        # to date by _put from then on
+        if self._zobrist is None:
+            key, keys = 0, self._keys
+            for cell, value in enumerate(self._raw.ravel().tolist()):
+                key ^= keys[value][cell]
+            self._zobrist = key
+        return self._zobrist
+
+    @property
+    def geometry(self):
+        # Neighbour and ray tables for this board's shape and NULL cells, shared
+        # with every other board that has the same ones
+        if self._geometry is None:
+            nulls = np.argwhere(self._cells.view(np.ndarray) == self._null).tolist()
+            self._geometry = _geometry(self.height, self.width, tuple(map(tuple, nulls)))
+        return self._geometry
+
+    def mark(self):
+        # Starts journaling cell writes if needed and returns a mark of the
+        # current journal position, to be handed back to undo_to. Entries
+        # older than every mark still referenced can never be undone, so they
+        # are dropped here
+        if self._journal is None:
+            self._journal, self._marks = [], []
+        end = self._journal_start + len(self._journal)
+        oldest, live = end, []
+        for ref in self._marks:
+            mark = ref()
+            if mark is not None:
+                oldest = min(oldest, mark.position)
+                live.append(ref)
+        del self._journal[:oldest - self._journal_start]
+        self._journal_start = oldest
+
+        mark = _Mark(end)
+        live.append(weakref.ref(mark))
+        self._marks = live
+        return mark
+
+    def undo_to(self, mark):
+        if self._snapshot is not None:
+            self._bind(self._cells.copy())
+
+        journal = self._journal
+        position = mark.position - self._journal_start
+        while len(journal) > position:
+            (x, y), old, _ = journal.pop()
+            self._put(x, y, old)
+            self.version += 1
+
+    def _write(self, view, key, value):
+        # Translates an assignment made through a view of this board's storage
+        # (possibly a buffer it has since moved away from) into cell writes.
+        # One piece written to one cell of the whole array or of one of its
+        # rows goes straight to _set_cell; only slices, masks and fancy keys
+        # are laid out over the cells by _cell_index
+        root = view if view.base is None else view.base
+        if isinstance(value, str):
+            if type(key) is tuple:
+                if view is root and len(key) == 2 and type(key[0]) is int and type(key[1]) is int:
+                    return self._set_cell(key[0], key[1], value)
+            elif type(key) is int and root is self._cells and view.ndim == 1 and len(view) == self.width and view.strides[0] == root.strides[1]:
+                if self._address is None:
+                    self._address = _address(root)
+                row, rest = divmod(_address(view) - self._address, root.strides[0])
+                if not rest:
+                    return self._set_cell(row, key, value)
+
+        cells = np.atleast_1d(_cell_index(root, view)[key])
+        values = np.broadcast_to(np.asarray(value, dtype=str), cells.shape)
+        for cell, piece in zip(cells.ravel(), values.ravel()):
+            self._set_cell(*divmod(int(cell), self.width), str(piece))
+
+
+    @property
+    def codes(self):
+        # Live int8 codes of a compact board; a freshly encoded array otherwise
+        return self._codes if self.compact else self.symbols.encode(self.layout)
+
+    def place_piece(self, move):
+        piece, (x, y) = get_move_elements(move)
+        self._set_cell(x, y, piece)
+
+    def move_piece(self, move):
+        (x0, y0), (x1, y1) = get_move_elements(move)
+        piece = self.layout[x0, y0]
+        self._set_cell(x0, y0, self.BLANK)
+        self._set_cell(x1, y1, piece)
+
+    def __str__(self):
+        # Rendered rows are kept until a write touches them
+        header, labels, col_left, col_right = _frame(self.height, self.width)
+        rows = self._render()
+        for i, row in enumerate(rows):
+            if row[1] is None:
+                row[1] = labels[i] + col_left + col_left.join([f'{c}{col_right}' for c in row[0]]) + '\n'
+        return header + ''.join([row[1] for row in rows])
+
+    def line(self, separator='/'):
+        # Single-line form for logs, one string of cells per row
+        return separator.join([row[0] for row in self._render()])
+
+    def _render(self):
+        # [cells, rendered row] per row, rebuilt for the rows marked dirty by _put
+        rows = self._rows
+        if rows is None:
+            rows = self._rows = [None] * self.height
+        for i, row in enumerate(rows):
+            if row is None:
+                cells = self._cells.view(np.ndarray)[i].tolist()
+                rows[i] = [''.join(self.symbols.decode(cells) if self.compact else cells), None]
+        return rows
+
+class BitBoard(Board):
+    # Board of at most 64 cells that also keeps one bit mask per piece symbol,
+    # bit x * width + y standing for cell (x, y). The masks follow every write,
+    # so occupancy questions become integer operations on them
+    def __init__(self, shape, layout=None, compact=False, symbols=''):
+        height, width = shape
+        if height * width > 64:
+            raise ValueError('A BitBoard holds at most 64 cells.')
+
+        self.full = (1 << height * width) - 1
+        self.masks = {self.BLANK: self.full}
+        super().__init__(shape, layout, compact, symbols)
+
+    def _put(self, x, y, value):
+        old, new = super()._put(x, y, value)
+        if old != new:
+            chars = self.symbols.chars
+            was, now = (chars[old], chars[new]) if self.compact else (str(old), str(new))
+            bit = 1 << (x % self.height * self.width + y % self.width)
+            self.masks[was] &= ~bit
+            self.masks[now] = self.masks.get(now, 0) | bit
+        return old, new
+
+    def mask(self, *pieces):
+        bits = 0
+        for piece in pieces:
+            bits |= self.masks.get(piece, 0)
+        return bits
+
+    @property
+    def empty(self):
+        return self.masks.get(self.BLANK, 0)
+
+    @property
+    def null(self):
+        return self.masks.get(self.NULL, 0)
+
+    @property
+    def occupied(self):
+        return self.full & ~(self.empty | self.null)
+
+    def bit(self, x, y):
+        return 1 << (x * self.width + y)
+
+    def cells(self, bits):
+        while bits:
+            low = bits & -bits
+            yield divmod(low.bit_length() - 1, self.width)
+            bits ^= low
+
+    @staticmethod
+    def popcount(bits):
+        return bits.bit_count()
+
+    def shift(self, bits, dx, dy):
+        # Moves every set cell by (dx, dy), dropping the ones that leave the board
+        sources = _shift_sources(self.height, self.width, dx, dy)
+        offset = dx * self.width + dy
+        bits &= sources
+        return bits << offset if offset >= 0 else bits >> -offset
+
+    def fill(self, bits, dx, dy, through):
+        # Cells reached by sliding from the set cells in direction (dx, dy) while
+        # staying inside through, not counting the starting cells
+        reached = 0
+        bits = self.shift(bits, dx, dy) & through
+        while bits:
+            reached |= bits
+            bits = self.shift(bits, dx, dy) & through & ~reached
+        return reached
+
+
+_frames = {}
+
+def _frame(rows, cols):
+    # Column header, row labels and cell padding of Board.__str__ for a shape
+    frame = _frames.get((rows, cols))
+    if frame is None:
+        row_width = int(log10(rows) + 1)
+        first_spacing = ' ' * (row_width + 1)
+        col_width = int(log10(cols)) + 1
+        col_left = ' ' * (col_width // 2)
+        col_right = ' ' * (col_width - col_width // 2)
+
+        header = first_spacing + ' '.join([('{:' + f'{col_width}' + 'd}').format(i) for i in range(cols)]) + '\n'
+        labels = [('{:' + f'{row_width}' + 'd}').format(i) + ' ' for i in range(rows)]
+        frame = _frames[rows, cols] = header, labels, col_left, col_right
+    return frame
+
+
+_shift_masks = {}
+
+def _shift_sources(height, width, dx, dy):
+    sources = _shift_masks.get((height, width, dx, dy))
+    if sources is None:
+        sources = 0
+        for x in range(max(0, -dx), min(height, height - dx)):
+            for y in range(max(0, -dy), min(width, width - dy)):
+                sources |= 1 << (x * width + y)
+        _shift_masks[height, width, dx, dy] = sources
+    return sources
+
+
+ORTHOGONAL = ((-1, 0), (0, 1), (1, 0), (0, -1))
+DIAGONAL = ((-1, 1), (1, 1), (1, -1), (-1, -1))
+DIRECTIONS = ORTHOGONAL + DIAGONAL
+KNIGHT = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+
+class Geometry:
+    # Precomputed tables for one board shape and set of NULL cells. Every table
+    # is indexed [x][y] and only ever lists cells that are on the board and not
+    # NULL; rays[x][y][d] runs outwards along DIRECTIONS[d] and stops before the
+    # first edge or NULL cell. Instances are shared, so treat them as read-only
+    def __init__(self, height, width, nulls=()):
+        self.height, self.width = height, width
+        self.nulls = frozenset(nulls)
+        self.valid = tuple(tuple((x, y) not in self.nulls for y in range(width)) for x in range(height))
+        self.null_mask = ~np.array(self.valid, dtype=bool).reshape(height, width)
+        self.null_mask.flags.writeable = False
+        self.cells = tuple((x, y) for x in range(height) for y in range(width) if self.valid[x][y])
+
+        self.orthogonal = self._steps(ORTHOGONAL)
+        self.diagonal = self._steps(DIAGONAL)
+        self.king = self._steps(DIRECTIONS)
+        self.knight = self._steps(KNIGHT)
+        self.rays = tuple(tuple(tuple(self._ray(x, y, dx, dy) for dx, dy in DIRECTIONS)
+                                for y in range(width)) for x in range(height))
+        self._movements = None
+        self._placements = {}
+
+    def movements(self, x, y):
+        # Moves from (x, y) to every other cell, built on first use
+        if self._movements is None:
+            self._movements = [[None] * self.width for _ in range(self.height)]
+        moves = self._movements[x][y]
+        if moves is None:
+            moves = self._movements[x][y] = tuple(parse_move(f'{x},{y} {a},{b}') for a, b in self.cells if (a, b) != (x, y))
+        return moves
+
+    def placements(self, piece):
+        # Placements of piece, one per cell, indexed [x][y] like the tables
+        moves = self._placements.get(piece)
+        if moves is None:
+            moves = self._placements[piece] = tuple(tuple(parse_move(f'{piece} {x},{y}') for y in range(self.width))
+                                                    for x in range(self.height))
+        return moves
+
+    def contains(self, x, y):
+        return 0 <= x < self.height and 0 <= y < self.width and self.valid[x][y]
+
+    def _steps(self, offsets):
+        return tuple(tuple(tuple((x + dx, y + dy) for dx, dy in offsets if self.contains(x + dx, y + dy))
+                           for y in range(self.width)) for x in range(self.height))
+
+    def _ray(self, x, y, dx, dy):
+        ray = []
+        x, y = x + dx, y + dy
+        while self.contains(x, y):
+            ray.append((x, y))
+            x, y = x + dx, y + dy
+        return tuple(ray)
+
+    def __reduce__(self):
+        return _geometry, (self.height, self.width, tuple(sorted(self.nulls)))
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class _Mark:
+    # Journal position handed out by Board.mark, counted from the board's
+    # first write
+    __slots__ = ('position', '__weakref__')
+
+    def __init__(self, position):
+        self.position = position
+
+
+_geometries = {}
+
+def _geometry(height, width, nulls=()):
+    key = (height, width, nulls)
+    geometry = _geometries.get(key)
+    if geometry is None:
+        geometry = _geometries[key] = Geometry(height, width, nulls)
+    return geometry
+
+
+_zobrist_tables = {}
+
+def _zobrist_keys(cells, piece):
+    # Random 64-bit keys, one per cell, for a piece symbol. They are seeded from
+    # the symbol itself so every board and every process agrees on them; blank
+    # cells hash to nothing, which makes an empty board's key 0
+    keys = _zobrist_tables.get((cells, piece))
+    if keys is None:
+        rng = np.random.default_rng([cells, *map(ord, piece)])
+        keys = _zobrist_tables[cells, piece] = rng.integers(0, 2**64, cells, dtype=np.uint64).tolist()
+    return keys
+
+class _ZobristKeys(dict):
+    # Keys of every cell by cell value, a character or on a compact board a
+    # code of symbols, made the first time the value is looked up
+    def __init__(self, cells, blank, symbols=None):
+        self.cells, self.blank, self.symbols = cells, blank, symbols
+
+    def __missing__(self, value):
+        char = value if self.symbols is None else self.symbols.chars[value]
+        keys = self[value] = [0] * self.cells if char == self.blank else _zobrist_keys(self.cells, char)
+        return keys
+
+_state_keys = {}
+
+def _state_key(name, value):
+    # Stable 64-bit key for one named piece of game state
+    frozen = (name, _frozen(value))
+    key = _state_keys.get(frozen)
+    if key is None:
+        from hashlib import blake2b
+        key = int.from_bytes(blake2b(repr(frozen).encode(), digest_size=8).digest(), 'little')
+        if len(_state_keys) >= MOVE_CACHE_LIMIT:
+            _state_keys.clear()
+        _state_keys[frozen] = key
+    return key
+
+def _frozen(value):
+    if isinstance(value, dict):
+        return tuple(sorted(((_frozen(k), _frozen(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(map(_frozen, value), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_frozen, value))
+    if isinstance(value, np.ndarray):
+        return value.shape, value.tobytes()
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def _address(array):
+    return array.__array_interface__['data'][0]
+
+
+_cell_indices = {}
+
+def _cell_index(root, view):
+    # Flat cell numbers laid out exactly like view is laid out over root
+    index = _cell_indices.get(root.shape)
+    if index is None:
+        index = _cell_indices[root.shape] = np.arange(root.size).reshape(root.shape)
+
+    offset = _address(view) - _address(root)
+    to_index = lambda n: n // root.itemsize * index.itemsize
+    return np.ndarray(view.shape, index.dtype, index, to_index(offset), tuple(map(to_index, view.strides)))
+
+if __name__ == '__main__':
+    pass
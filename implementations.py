@@ -0,0 +1,223 @@
+import glob
+import io
+import os
+import runpy
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+from game import Game
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Results')
+
+
+class _Built(Exception):
+    pass
+
+
+def load_game(path):
+    # Runs an implementation script the way `python path` would, but hands back
+    # the game its __main__ block builds instead of entering game_loop
+    built = []
+
+    def capture(self):
+        built.append(self)
+        raise _Built
+
+    game_loop = Game.game_loop
+    Game.game_loop = capture
+    try:
+        with redirect_stdout(io.StringIO()):
+            runpy.run_path(path, run_name='__main__')
+    except _Built:
+        pass
+    finally:
+        Game.game_loop = game_loop
+
+    if not built:
+        raise ValueError(f'{path} does not start a game.')
+    return built[0]
+
+
+def implementations(name='*', model='*'):
+    # Scripts under Results written against game.py, as opposed to the
+    # -independent ones that carry their own board and loop
+    paths = glob.glob(os.path.join(RESULTS, model, f'{name}.py'))
+    return sorted(path for path in paths if _uses_api(path))
+
+
+def _uses_api(path):
+    with open(path, encoding='utf-8') as file:
+        return 'from game import' in file.read()
+
+
+def playout(game, rng, max_plies=500):
+    # Plays uniformly random legal moves from the game's current position.
+    # Returns the moves played, whether the game finished and its winner
+    moves = []
+    while len(moves) < max_plies:
+        legal = game.legal_moves()
+        if not legal:
+            break
+        move = legal[rng.integers(len(legal))]
+        accepted, finished, winner = game.step(move)
+        if not accepted:
+            break
+        moves.append(move)
+        if finished:
+            return moves, True, winner
+    return moves, False, None
+
+
+def _new(name):
+    # A maker for games built by calling name from the script with no arguments
+    return lambda namespace: namespace[name]()
+
+
+def _coordinates(move):
+    return sum(move.positions, ())
+
+
+def _claude_peridot(namespace):
+    # Claude's Peridot is a handful of functions around a bare board
+    return SimpleNamespace(board=namespace['create_board'](), current_player=1, rules=namespace)
+
+
+def _claude_peridot_move(game, move):
+    row, col = move.positions[0]
+    rules, piece = game.rules, 'A' if game.current_player == 1 else 'V'
+    if not rules['is_valid_move'](game.board, row, col):
+        return False
+    game.board[row][col] = piece
+    if not rules['check_win'](game.board, piece) and not rules['is_board_full'](game.board):
+        game.current_player = 3 - game.current_player
+    return True
+
+
+def _gpt_peridot_move(game, move):
+    # As the script's loop: the player only changes while the game goes on
+    if not game.make_move(*move.positions[0]):
+        return False
+    if not game.check_winner() and not game.is_tie():
+        game.switch_player()
+    return True
+
+
+def _gpt_quartz_move(game, move):
+    # GPT-4o's Quartz leaves passing and turn order to its input loop
+    other = 'A' if game.current_player == 'V' else 'V'
+    if not game.has_valid_moves(game.current_player):
+        game.current_player = other
+        other = 'A' if other == 'V' else 'V'
+    accepted = game.make_move(*move.positions[0], game.current_player)
+    if accepted:
+        game.current_player = other
+    return accepted
+
+
+def _deepseek_tangerine_move(game, move):
+    piece = 'H' if game.current_player == 1 else 'V'
+    if not game.is_valid_move(*move.positions[0], piece):
+        return False
+    game.place_piece(*move.positions[0], piece)
+    if not game.check_game_over():
+        game.switch_player()
+    return True
+
+
+def _gpt_tangerine_move(game, move):
+    piece = game.pieces[game.current_player]
+    if not game.is_valid_move(piece, *move.positions[0]):
+        return False
+    game.place_piece(piece, *move.positions[0])
+    game.switch_player()
+    return True
+
+
+def _gpt_saffron_move(game, move):
+    # move_piece returns whether the game is over, not whether it moved
+    if not game.is_valid_move(*move.positions[-1]):
+        return False
+    if not game.move_piece('A' if game.current_player == 1 else 'B', *move.positions[-1]):
+        game.current_player = 2 if game.current_player == 1 else 1
+    return True
+
+
+def _claude_lazuli_move(game, move):
+    jump = _coordinates(move)
+    return jump in game.get_valid_moves() and game.make_move(*jump)
+
+
+def _claude_daisy_move(game, move):
+    if move.placement:
+        accepted, _ = game.place_piece(move.piece, *move.positions[0])
+    else:
+        accepted, _ = game.move_piece(*move.positions)
+    if accepted:
+        game.switch_player()
+    return accepted
+
+
+def _deepseek_daisy_move(game, move):
+    if move.placement:
+        accepted = game.place_piece(move.piece, *move.positions[0])
+    else:
+        accepted = game.move_piece(*_coordinates(move))
+    if accepted:
+        game.switch_player()
+    return accepted
+
+
+def _claude_violet_move(game, move):
+    # The API plays the shot as a move of its own, which ends the turn
+    if move.movement:
+        return game.move_piece(*move.positions)
+    game.shoot_x(None, move.positions[0])
+    game.switch_player()
+    return True
+
+
+# How to replay a game of an API implementation on the -independent script of
+# the same game: a function building a fresh game from the script's
+# namespace, and one applying a parsed Move to it that returns whether the
+# script accepted it. The scripts share no interface, so each has an entry of
+# its own. None is given for orchid and topaz, whose scripts split a turn
+# differently from the API; for Claude's amethyst, whose API implementation
+# plays moves its script has no counterpart for; for DeepSeek's and GPT-4o's
+# violet, whose API implementations do not load; or for GPT-4o's amethyst,
+# daisy and obsidian, which run their input loop on import
+REPLAYS = {
+    'Claude/quartz-independent': (_new('QuartzGame'), lambda game, move: game.make_move(*move.positions[0])),
+    'DeepSeek/quartz-independent': (_new('QuartzGame'), lambda game, move: game.make_move(*move.positions[0])),
+    'GPT-4o/quartz-independent': (_new('Quartz'), _gpt_quartz_move),
+    'Claude/peridot-independent': (_claude_peridot, _claude_peridot_move),
+    'DeepSeek/peridot-independent': (_new('Peridot'), lambda game, move: game.make_move(*move.positions[0])),
+    'GPT-4o/peridot-independent': (_new('Peridot'), _gpt_peridot_move),
+    'Claude/tangerine-independent': (_new('TangerineGame'), lambda game, move: game.make_move(*move.positions[0])),
+    'DeepSeek/tangerine-independent': (_new('TangerineGame'), _deepseek_tangerine_move),
+    'GPT-4o/tangerine-independent': (_new('Tangerine'), _gpt_tangerine_move),
+    'Claude/saffron-independent': (_new('SaffronGame'), lambda game, move: game.make_move(*move.positions[-1])),
+    'DeepSeek/saffron-independent': (_new('SaffronGame'), lambda game, move: game.move_piece(*move.positions[-1])),
+    'GPT-4o/saffron-independent': (_new('SaffronGame'), _gpt_saffron_move),
+    'Claude/lazuli-independent': (_new('Lazuli'), _claude_lazuli_move),
+    'DeepSeek/lazuli-independent': (_new('Lazuli'), lambda game, move: game.make_move(*_coordinates(move))),
+    'GPT-4o/lazuli-independent': (_new('Lazuli'), lambda game, move: game.make_move(*move.positions)),
+    'Claude/lilac-independent': (_new('Lilac'), lambda game, move: game.make_move(*_coordinates(move))),
+    'DeepSeek/lilac-independent': (_new('LilacGame'), lambda game, move: game.move_piece(*_coordinates(move))),
+    'GPT-4o/lilac-independent': (_new('LilacGame'), lambda game, move: game.make_move(*_coordinates(move))),
+    'Claude/obsidian-independent': (_new('Game'), lambda game, move: game.make_move(*move.positions)),
+    'DeepSeek/obsidian-independent': (_new('ObsidianGame'), lambda game, move: game.make_move(*move.positions)),
+    'DeepSeek/amethyst-independent': (_new('AmethystGame'), lambda game, move: game.move_piece(*_coordinates(move))[0]),
+    'Claude/daisy-independent': (_new('DaisyGame'), _claude_daisy_move),
+    'DeepSeek/daisy-independent': (_new('DaisyGame'), _deepseek_daisy_move),
+    'Claude/violet-independent': (_new('Violet'), _claude_violet_move),
+}
+
+
+def independent_game(path):
+    # Runs the -independent script at path without its main block and returns
+    # a function building a fresh game of it and the function playing a Move
+    # on one, from REPLAYS. A KeyError when the script has no entry
+    make, apply = REPLAYS[os.path.relpath(path, RESULTS)[:-3]]
+    with redirect_stdout(io.StringIO()):
+        namespace = runpy.run_path(path, run_name='replay')
+    return lambda: make(namespace), apply
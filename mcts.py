@@ -0,0 +1,285 @@
+import argparse
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from game import Game
+from implementations import RESULTS, load_game
+
+# Outcomes of a node: still open, drawn (ties, and games that stop without a
+# winner), or the index of the winning player
+OPEN, DRAW = -2, -1
+
+
+def random_rollout(game, rng):
+    # A uniformly random legal move, or None when there is none. Candidates
+    # are validated in random order up to the first one accepted, which is
+    # far fewer than legal_moves validates, and rollout positions are seldom
+    # seen twice for its cache to pay off
+    if type(game).legal_moves is Game.legal_moves and game.__dict__.get('_outcome') is None:
+        candidates = game.candidate_moves()
+        accepted = game._accepted(candidates[i] for i in rng.permutation(len(candidates)).tolist())
+        move = next(accepted, None)
+        accepted.close()
+        if move is not None:
+            return move
+    legal = game.legal_moves()
+    return legal[rng.integers(len(legal))] if legal else None
+
+
+class MCTS:
+    # UCT search over any Game, played on the game itself: every playout
+    # starts from a mark taken at the root and is undone back to it, so no
+    # position is ever copied. Nodes live in an arena of parallel arrays, the
+    # children of a node in one contiguous block, and each node scores its
+    # playouts for the player who made the move into it. That player is read
+    # off the game before every move, so turns where next_player hands the
+    # move back to the same player (a move and then a shot, a pending
+    # capture, a multi-jump) need nothing special. The tree is kept between
+    # searches: when the game has moved on to a position the tree already
+    # reached, the search carries on from there
+    def __init__(self, seconds=None, playouts=None, exploration=1.4, rollout=random_rollout,
+                 max_depth=200, reuse_depth=4, capacity=1 << 12):
+        # Searches stop at whichever budget runs out first, and take a second
+        # when given neither
+        self.seconds = 1.0 if seconds is None and playouts is None else seconds
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rollout = rollout
+        self.max_depth = max_depth
+        self.reuse_depth = reuse_depth
+        self.players = {}
+        self._clear(capacity)
+
+    def _clear(self, capacity):
+        self.parent = np.full(capacity, -1, np.int32)
+        self.first = np.full(capacity, -1, np.int32)
+        self.count = np.zeros(capacity, np.int32)
+        self.visits = np.zeros(capacity)
+        self.value = np.zeros(capacity)
+        self.mover = np.full(capacity, -1, np.int16)
+        self.outcome = np.full(capacity, OPEN, np.int16)
+        self.moves = [None] * capacity
+        self.keys = {}
+        self.size = 1
+        self.game = None
+
+    def _allocate(self, n):
+        # Index of a block of n fresh nodes, growing the arena when full
+        start, capacity = self.size, len(self.visits)
+        if start + n > capacity:
+            grown = max(2 * capacity, start + n)
+            for name, fill in (('parent', -1), ('first', -1), ('count', 0), ('visits', 0),
+                               ('value', 0), ('mover', -1), ('outcome', OPEN)):
+                old = getattr(self, name)
+                new = np.full(grown, fill, old.dtype)
+                new[:capacity] = old
+                setattr(self, name, new)
+            self.moves += [None] * (grown - capacity)
+        self.size += n
+        return start
+
+    def _index(self, player):
+        return self.players.setdefault(getattr(player, 'value', player), len(self.players))
+
+    @staticmethod
+    def _position(game):
+        return game.position_hash(), game.__dict__.get('round')
+
+    def _reroot(self, key):
+        # Makes the node of the position key, looked for within reuse_depth
+        # plies of the root, the new root. False when the tree never got there
+        frontier = [0]
+        for _ in range(self.reuse_depth + 1):
+            for node in frontier:
+                if self.keys.get(node) == key:
+                    if node:
+                        self._keep(node)
+                    return True
+            frontier = [child for node in frontier if self.first[node] >= 0
+                        for child in range(self.first[node], self.first[node] + self.count[node])]
+        return False
+
+    def _keep(self, node):
+        # Moves the subtree under node to the front of a fresh arena, node
+        # first, dropping everything else
+        first, count, moves, keys = self.first, self.count, self.moves, self.keys
+        old = {name: getattr(self, name) for name in ('visits', 'value', 'mover', 'outcome')}
+        game, players = self.game, self.players
+        self._clear(len(self.visits))
+        self.game, self.players = game, players
+        for name, values in old.items():
+            getattr(self, name)[0] = values[node]
+
+        queue = deque([(node, 0)])
+        while queue:
+            source, target = queue.popleft()
+            if source in keys:
+                self.keys[target] = keys[source]
+            start, n = first[source], count[source]
+            if start < 0:
+                continue
+            block = self.size
+            self.size += n
+            self.first[target], self.count[target] = block, n
+            self.parent[block:block + n] = target
+            for name, values in old.items():
+                getattr(self, name)[block:block + n] = values[start:start + n]
+            self.moves[block:block + n] = moves[start:start + n]
+            queue.extend((start + i, block + i) for i in range(n))
+
+    def _expand(self, node, game):
+        # Children for every legal move of the position node stands for
+        legal = game.legal_moves()
+        self.keys[node] = self._position(game)
+        if not legal:
+            self.outcome[node] = DRAW
+            return
+        block = self._allocate(len(legal))
+        end = block + len(legal)
+        self.parent[block:end] = node
+        self.mover[block:end] = self._index(game.current_player)
+        self.moves[block:end] = legal
+        self.first[node], self.count[node] = block, len(legal)
+
+    def _select(self, node, rng):
+        # An unvisited child at random, or else the child with the best UCB1
+        start, n = self.first[node], self.count[node]
+        visits = self.visits[start:start + n]
+        unvisited = np.flatnonzero(visits == 0)
+        if len(unvisited):
+            return start + int(unvisited[rng.integers(len(unvisited))])
+        ucb = self.value[start:start + n] / visits + self.exploration * np.sqrt(np.log(self.visits[node]) / visits)
+        return start + int(np.argmax(ucb))
+
+    def _descend(self, node, game, rng):
+        # Plays the move of a child chosen below node. Returns the child
+        child = self._select(node, rng)
+        accepted, finished, winner = game.step(self.moves[child])
+        if not accepted:
+            self.outcome[child] = DRAW
+        elif finished:
+            self.outcome[child] = DRAW if winner is None else self._index(winner)
+        return child
+
+    def _simulate(self, game, rng):
+        # Outcome of a game finished by the rollout policy, a draw if it runs
+        # past max_depth plies or the policy has no move
+        for _ in range(self.max_depth):
+            move = self.rollout(game, rng)
+            if move is None:
+                return DRAW
+            accepted, finished, winner = game.step(move)
+            if not accepted:
+                return DRAW
+            if finished:
+                return DRAW if winner is None else self._index(winner)
+        return DRAW
+
+    def search(self, game, rng=None, seconds=None, playouts=None):
+        # Runs playouts from the game's position until the time or playout
+        # budget, given here or to the constructor, runs out, and leaves the
+        # game as it found it. Returns the playouts run
+        rng = np.random.default_rng() if rng is None else rng
+        if seconds is None and playouts is None:
+            seconds, playouts = self.seconds, self.playouts
+        if self.game is not game or not self._reroot(self._position(game)):
+            self._clear(len(self.visits))
+            self.game = game
+
+        root = game.mark()
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        done = 0
+        try:
+            while (playouts is None or done < playouts) and (deadline is None or time.perf_counter() < deadline):
+                node, path = 0, [0]
+                while self.outcome[node] == OPEN and self.first[node] >= 0:
+                    node = self._descend(node, game, rng)
+                    path.append(node)
+                if self.outcome[node] == OPEN:
+                    self._expand(node, game)
+                    if self.outcome[node] == OPEN:
+                        node = self._descend(node, game, rng)
+                        path.append(node)
+                result = self.outcome[node] if self.outcome[node] != OPEN else self._simulate(game, rng)
+
+                for node in path:
+                    self.visits[node] += 1
+                    self.value[node] += 0.5 if result == DRAW else float(self.mover[node] == result)
+                game.undo_to(root)
+                done += 1
+        finally:
+            game.undo_to(root)
+        return done
+
+    def statistics(self):
+        # {move: (visits, mean score)} over the root's children
+        start, n = self.first[0], self.count[0]
+        if start < 0:
+            return {}
+        return {self.moves[i]: (int(self.visits[i]), self.value[i] / self.visits[i] if self.visits[i] else 0.0)
+                for i in range(start, start + n)}
+
+    def best(self):
+        # The root's most visited move, None before the root is expanded
+        start, n = self.first[0], self.count[0]
+        if start < 0:
+            return None
+        return self.moves[start + int(np.argmax(self.visits[start:start + n]))]
+
+    def choose(self, game, rng=None):
+        # The best move after a search from the game's position, or None when
+        # there is no legal move
+        if not game.legal_moves():
+            return None
+        self.search(game, rng)
+        return self.best()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays one game of an implementation between MCTS and an opponent.')
+    parser.add_argument('implementation', help='e.g. Claude/quartz')
+    parser.add_argument('--seconds', type=float, help='search time per move')
+    parser.add_argument('--playouts', type=int, help='playouts per move')
+    parser.add_argument('--opponent', choices=('random', 'mcts'), default='random')
+    parser.add_argument('--seat', type=int, choices=(0, 1), default=0, help='seat MCTS plays from, 0 moving first')
+    parser.add_argument('--plies', type=int, default=500, help='longest game')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    game = load_game(os.path.join(RESULTS, args.implementation + '.py'))
+    rng = np.random.default_rng(args.seed)
+    engine = MCTS(args.seconds, args.playouts)
+    seats, finished, winner, ply = {}, False, None, 0
+    while ply < args.plies and not finished:
+        seat = seats.setdefault(getattr(game.current_player, 'value', game.current_player), len(seats))
+        if seat % 2 == args.seat or args.opponent == 'mcts':
+            start = time.perf_counter()
+            playouts = engine.search(game, rng) if game.legal_moves() else 0
+            elapsed = time.perf_counter() - start
+            move = engine.best() if playouts else None
+            visits, score = engine.statistics().get(move, (0, 0.0))
+            detail = f'{playouts} playouts ({playouts / elapsed:.0f}/s), {visits} visits to the move, score {score:.2f}'
+        else:
+            move, detail = random_rollout(game, rng), 'random'
+        if move is None:
+            break
+        accepted, finished, winner = game.step(move)
+        if not accepted:
+            print(f'{move} was rejected')
+            break
+        ply += 1
+        print(f'{ply:>4}  seat {seat}  {str(move):<12}{detail}')
+
+    if not finished:
+        print('Unfinished')
+    elif winner is None:
+        print('Tie')
+    else:
+        print(f'Seat {seats.setdefault(getattr(winner, "value", winner), len(seats))} wins')
+
+
+if __name__ == '__main__':
+    main()
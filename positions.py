@@ -0,0 +1,162 @@
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Outcome column values besides the code of the winning player
+TIE = -1
+UNKNOWN = -2
+
+
+def _dtype(record_size):
+    return np.dtype([
+        ('game', '<i8'), ('ply', '<i4'), ('player', '<i2'), ('outcome', 'i1'),
+        ('record', 'u1', (record_size,)),
+    ])
+
+
+class PositionStore:
+    # Positions on disk as fixed-width rows: game id, ply, side to move and
+    # outcome columns followed by a Game.to_bytes record. Rows are read
+    # through a numpy.memmap, so indexing returns views of the file, and
+    # written by appending whole rows under a file lock, so any number of
+    # processes can add to the same store. The record size and the players
+    # table live in a small JSON file next to the data; one store holds
+    # positions of one game. Players, whatever the game uses for them (None,
+    # numbers, symbols, enum members), are stored as their index in the table
+    def __init__(self, path, record_size=None):
+        self.path = path
+        meta = path + '.json'
+        if record_size is not None and not os.path.exists(meta):
+            # Written aside and linked into place, so that concurrent openers
+            # never see it half written and only the first one creates it
+            temporary = f'{meta}.{os.getpid()}'
+            with open(temporary, 'w', encoding='utf-8') as file:
+                json.dump({'record_size': record_size, 'players': []}, file)
+            try:
+                os.link(temporary, meta)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(temporary)
+        self._meta = meta
+        self._read_meta()
+        if record_size is not None and record_size != self.record_size:
+            raise ValueError(f'{path} holds records of {self.record_size} bytes, not {record_size}.')
+
+        self.dtype = _dtype(self.record_size)
+        self._rows = None
+        self._fd = None
+
+    def _read_meta(self):
+        with open(self._meta, encoding='utf-8') as file:
+            meta = json.load(file)
+        self.record_size = meta['record_size']
+        self.players = meta.get('players', [])
+
+    def code(self, player):
+        # The index of a player in the players table, which it joins if it is
+        # new. The table only grows, and under the same lock as the rows, so
+        # codes mean the same in every process writing to the store
+        value = json.loads(json.dumps(getattr(player, 'value', player)))
+        if value in self.players:
+            return self.players.index(value)
+        with self._locked():
+            self._read_meta()
+            if value not in self.players:
+                self.players.append(value)
+                temporary = f'{self._meta}.{os.getpid()}'
+                with open(temporary, 'w', encoding='utf-8') as file:
+                    json.dump({'record_size': self.record_size, 'players': self.players}, file)
+                os.replace(temporary, self._meta)
+        return self.players.index(value)
+
+    def player(self, code):
+        # The player stored as code, with enum members as their values
+        if code >= len(self.players):
+            self._read_meta()
+        return self.players[code]
+
+    def append(self, games, plies, players, outcomes, records):
+        # Appends one row per position; every argument holds one entry per
+        # row, players and winners given as their codes
+        rows = np.zeros(len(records), dtype=self.dtype)
+        rows['game'], rows['ply'], rows['player'], rows['outcome'] = games, plies, players, outcomes
+        rows['record'] = np.frombuffer(b''.join(records), dtype=np.uint8).reshape(len(records), self.record_size)
+
+        data = memoryview(rows.tobytes())
+        with self._locked():
+            while data:
+                data = data[os.write(self._fd, data):]
+
+    @contextmanager
+    def _locked(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @property
+    def rows(self):
+        # Memory map of the rows written so far; refresh() picks up later ones
+        if self._rows is None:
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            count = size // self.dtype.itemsize
+            self._rows = np.memmap(self.path, self.dtype, 'r', shape=(count,)) if count else np.zeros(0, self.dtype)
+        return self._rows
+
+    def refresh(self):
+        self._rows = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, key):
+        return self.rows[key]
+
+    def sample(self, count, rng):
+        return self.rows[np.sort(rng.integers(0, len(self), count))]
+
+    def state(self, row, game):
+        # The State of a row, unpacked by a game of the kind that wrote it
+        return game.from_bytes(self.rows['record'][row].tobytes())
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def store_game(store, game, moves, game_id):
+    # Replays moves from the game's initial position and appends every
+    # position reached, the initial one included, labelled with the outcome
+    game.reset()
+    records, players = [game.to_bytes()], [game.current_player]
+    finished, winner = False, None
+    for move in moves:
+        accepted, finished, winner = game.step(move)
+        if not accepted:
+            raise ValueError(f'{move!r} was rejected.')
+        records.append(game.to_bytes())
+        players.append(game.current_player)
+
+    outcome = UNKNOWN if not finished else TIE if winner is None else store.code(winner)
+    store.append(game_id, np.arange(len(records)), [store.code(player) for player in players], outcome, records)
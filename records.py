@@ -0,0 +1,135 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+from collections import namedtuple
+from itertools import islice
+
+from game import load_script, parse_move
+from implementations import RESULTS, load_game
+
+# One game: its header (game, implementation, seed and anything else worth
+# keeping), the moves played, the position digest after each of them when
+# recorded, and the outcome as {'finished': bool, 'winner': ...}
+Record = namedtuple('Record', 'header moves digests result', defaults=[None, None])
+
+
+def digest(game):
+    return format(game.position_hash(), '016x')
+
+
+def _open(path, mode):
+    # Records are plain text, gzipped when the name ends in .gz. Appending to
+    # a gzip file adds a member, which readers see as one stream
+    if os.fspath(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class RecordWriter:
+    # Appends records to a file, one JSON object per line, either whole with
+    # write or move by move between begin and end
+    def __init__(self, path, digests=True):
+        self.file = _open(path, 'a')
+        self.digests = digests
+        self._current = None
+
+    def write(self, record):
+        entry = {'header': record.header, 'moves': [str(move) for move in record.moves]}
+        if record.digests is not None:
+            entry['digests'] = record.digests
+        if record.result is not None:
+            entry['result'] = record.result
+        self.file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def begin(self, **header):
+        self._current = Record(header, [], [] if self.digests else None)
+
+    def move(self, move, game=None):
+        # Adds a move to the game begun last; given the game it was played in,
+        # the digest of the resulting position is kept along with it
+        self._current.moves.append(move)
+        if self.digests and game is not None:
+            self._current.digests.append(digest(game))
+
+    def end(self, finished=False, winner=None):
+        record, self._current = self._current, None
+        self.write(record._replace(result={'finished': finished, 'winner': _plain(winner)}))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _plain(value):
+    # Winners are often Enum members, which JSON cannot hold
+    return getattr(value, 'value', value)
+
+
+def read_records(path, batch=None):
+    # Yields the records of a file one at a time, or in lists of up to batch
+    # records with their moves already parsed
+    with _open(path, 'r') as file:
+        entries = (json.loads(line) for line in file if line.strip())
+        records = (Record(entry['header'], entry['moves'], entry.get('digests'), entry.get('result'))
+                   for entry in entries)
+        if batch is None:
+            yield from records
+            return
+        while chunk := list(islice(records, batch)):
+            yield [record._replace(moves=[parse_move(move) for move in record.moves]) for record in chunk]
+
+
+def from_script(path, **header):
+    # A record of the moves listed one per line in a text file, as fed to
+    # scripted_input, e.g. daisy.txt
+    return Record(header, load_script(path))
+
+
+def replay(record, game, verify=True):
+    # Plays a record from the game's initial position through step, yielding
+    # (move, finished, winner) per ply. Raises ValueError when a move is
+    # rejected or, with verify, when a recorded digest does not match
+    game.reset()
+    for ply, move in enumerate(record.moves):
+        accepted, finished, winner = game.step(move)
+        if not accepted:
+            raise ValueError(f'Ply {ply}: {move!r} was rejected.')
+        if verify and record.digests and ply < len(record.digests) and digest(game) != record.digests[ply]:
+            raise ValueError(f'Ply {ply}: position after {move!r} does not match its digest.')
+        yield move, finished, winner
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays game records through the implementations named in their headers.')
+    parser.add_argument('path')
+    parser.add_argument('--no-verify', dest='verify', action='store_false', help='skip digest checks')
+    parser.add_argument('--batch', type=int, default=1024)
+    args = parser.parse_args()
+
+    games, replayed, failed = {}, 0, 0
+    for records in read_records(args.path, args.batch):
+        for record in records:
+            implementation = record.header['implementation']
+            try:
+                if implementation not in games:
+                    games[implementation] = load_game(os.path.join(RESULTS, implementation))
+                for _ in replay(record, games[implementation], args.verify):
+                    pass
+                replayed += 1
+            except Exception as e:
+                failed += 1
+                print(f'{implementation}: {type(e).__name__}: {e}', file=sys.stderr)
+
+    print(f'{replayed} records replayed, {failed} failed')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import os
+from copy import deepcopy
+
+import numpy as np
+
+from implementations import RESULTS, implementations, load_game, playout
+
+# One line per message, client to server:
+#   PLAY <implementation> [<match>]   e.g. PLAY Claude/daisy, once, first
+#   <move>                            e.g. "A 3,4" or "0,1 2,1", when told TURN
+# and server to client:
+#   SEAT <n>               the seat taken; seats move in order of the
+#                          players' first turns
+#   START                  every seat is taken
+#   TURN <board>           your move, with the board as Board.line(): rows
+#                          of cells separated by /, NULL cells given as #
+#   MOVED <seat> <move>    a move accepted, sent to every seat
+#   REJECTED <message>     your move was not accepted; TURN follows
+#   END <how> [<seat>]     WIN <seat>, TIE, TIMEOUT <seat>, LEFT <seat>,
+#                          UNFINISHED or ERROR; the connection is closed
+#   ERROR <message>        the PLAY line was not understood
+# Clients naming the same match play together, the others fill the oldest
+# open match of their implementation. A match has as many seats as its game
+# has players, one for Lazuli
+
+NULL = '#'
+
+
+class _Seat:
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    async def send(self, line, timeout):
+        # drain() waits while the client's socket buffer is full, so a slow
+        # reader holds up its own match and nothing else
+        self.writer.write(line.encode() + b'\n')
+        async with asyncio.timeout(timeout):
+            await self.writer.drain()
+
+
+class _Match:
+    def __init__(self, implementation, name, players):
+        self.implementation, self.name = implementation, name
+        self.seats = []
+        self.players = players
+        self.full = asyncio.Event()
+        self.done = asyncio.Event()
+
+
+class MatchServer:
+    # Hosts matches of the API implementations under Results, any number at a
+    # time on one event loop. Every match holds its own Game, taken from a pool
+    # of reset games per implementation, and moves through Game.step, so a
+    # match costs a game object rather than a process. Each turn has
+    # move_timeout seconds and each match match_timeout seconds in all. At
+    # most max_matches are played at once; players past that wait for a slot.
+    # Moves are played on the event loop itself: step swaps sys.stdin and
+    # sys.stdout while the implementation runs, so it cannot run on other
+    # threads, and every match waits while one move is validated and played.
+    # Implementations slow enough to matter belong in separate processes.
+    # players fixes the seats per match; by default each implementation gets
+    # as many as the players taking turns in a random game of it
+    def __init__(self, players=None, move_timeout=30, match_timeout=3600, max_matches=10000,
+                 max_rejections=100, line_limit=4096, backlog=4096):
+        self.players = players
+        self.move_timeout, self.match_timeout = move_timeout, match_timeout
+        self.max_rejections = max_rejections
+        self.line_limit, self.backlog = line_limit, backlog
+        self.slots = asyncio.Semaphore(max_matches)
+        self.available = {os.path.relpath(path, RESULTS)[:-3].replace(os.sep, '/'): path
+                          for path in implementations()}
+        self.played = 0
+        self._open = {}
+        self._named = {}
+        self._prototypes = {}
+        self._players = {}
+        self._idle = {}
+        self._servers = []
+        self._hosts = set()
+
+    async def start(self, host='127.0.0.1', port=None, path=None):
+        # Listens on a TCP port or a Unix socket; port 0 picks a free port,
+        # which the returned address gives
+        if path is not None:
+            server = await asyncio.start_unix_server(self._client, path, limit=self.line_limit, backlog=self.backlog)
+        else:
+            server = await asyncio.start_server(self._client, host, port, limit=self.line_limit, backlog=self.backlog)
+        self._servers.append(server)
+        return server.sockets[0].getsockname()
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+
+    async def _client(self, reader, writer):
+        seat = _Seat(reader, writer)
+        try:
+            request = await asyncio.wait_for(reader.readline(), self.move_timeout)
+            words = request.decode(errors='replace').split()
+            if len(words) not in (2, 3) or words[0] != 'PLAY' or words[1] not in self.available:
+                await seat.send(f'ERROR expected PLAY <implementation> [<match>], e.g. PLAY {min(self.available)}',
+                                self.move_timeout)
+                return
+            match = self._join(words[1], words[2] if len(words) == 3 else None, seat)
+            await seat.send(f'SEAT {match.seats.index(seat)}', self.move_timeout)
+            if len(match.seats) == match.players:
+                match.full.set()
+                # The loop only keeps weak references to its tasks
+                task = asyncio.create_task(self._host(match))
+                self._hosts.add(task)
+                task.add_done_callback(self._hosts.discard)
+            try:
+                await asyncio.wait_for(match.full.wait(), self.match_timeout)
+            except asyncio.TimeoutError:
+                match.seats.remove(seat)
+                await seat.send('END UNFINISHED', self.move_timeout)
+                return
+            await match.done.wait()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _join(self, implementation, name, seat):
+        # The named match, or the oldest one of the implementation still open
+        players = self.seats(implementation)
+        if name is not None:
+            match = self._named.get((implementation, name))
+            if match is None or match.full.is_set():
+                match = self._named[implementation, name] = _Match(implementation, name, players)
+        else:
+            waiting = self._open.setdefault(implementation, [])
+            while waiting and waiting[0].full.is_set():
+                waiting.pop(0)
+            if not waiting:
+                waiting.append(_Match(implementation, None, players))
+            match = waiting[0]
+        match.seats.append(seat)
+        if len(match.seats) == match.players and name is not None:
+            del self._named[implementation, name]
+        return match
+
+    async def _host(self, match):
+        async with self.slots:
+            game = self._acquire(match.implementation)
+            try:
+                end = await asyncio.wait_for(self._play(match, game), self.match_timeout)
+            except asyncio.TimeoutError:
+                end = 'UNFINISHED'
+            except _Left as e:
+                end = f'LEFT {e.args[0]}'
+            except Exception:
+                end = 'ERROR'
+            await self._broadcast(match, f'END {end}', quietly=True)
+            self._release(match.implementation, game)
+            self.played += 1
+            match.done.set()
+
+    async def _play(self, match, game):
+        await self._broadcast(match, 'START')
+        seats, number = {}, 0
+
+        def seat_of(player):
+            # Seats go to players in the order they first get the turn. None,
+            # the player of games without turns, keeps the seat that last
+            # moved
+            key = getattr(player, 'value', player)
+            if key is None:
+                return number
+            if key not in seats:
+                seats[key] = len(seats)
+            return seats[key]
+
+        board = game.board
+        while True:
+            number = seat_of(game.current_player)
+            if number >= len(match.seats):
+                return 'ERROR'
+            seat = match.seats[number]
+            rejections = 0
+            while True:
+                await self._send(match, number, f'TURN {board.line().replace(board.NULL, NULL)}')
+                try:
+                    async with asyncio.timeout(self.move_timeout):
+                        line = await seat.reader.readline()
+                except asyncio.TimeoutError:
+                    return f'TIMEOUT {number}'
+                except (ConnectionError, ValueError, asyncio.LimitOverrunError):
+                    raise _Left(number)
+                if not line:
+                    raise _Left(number)
+                text = line.decode(errors='replace').strip()
+                accepted, finished, winner = game.step(text)
+                if accepted:
+                    break
+                rejections += 1
+                if rejections > self.max_rejections:
+                    return f'TIMEOUT {number}'
+                await self._send(match, number, f'REJECTED {_reason(game)}')
+
+            await self._broadcast(match, f'MOVED {number} {text}')
+            if finished:
+                return 'TIE' if winner is None else f'WIN {seat_of(winner)}'
+
+    async def _send(self, match, number, line):
+        try:
+            await match.seats[number].send(line, self.move_timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            raise _Left(number)
+
+    async def _broadcast(self, match, line, quietly=False):
+        for number in range(len(match.seats)):
+            try:
+                await self._send(match, number, line)
+            except _Left:
+                if not quietly:
+                    raise
+
+    def _acquire(self, implementation):
+        # Games are built once per implementation by running its script and
+        # copied from then on; finished ones are reset and reused
+        idle = self._idle.setdefault(implementation, [])
+        if idle:
+            return idle.pop()
+        return deepcopy(self._prototype(implementation))
+
+    def _prototype(self, implementation):
+        if implementation not in self._prototypes:
+            self._prototypes[implementation] = load_game(self.available[implementation])
+        return self._prototypes[implementation]
+
+    def seats(self, implementation):
+        # Seats per match of an implementation: players, or the players taking
+        # turns over a random game on a copy of the prototype, None counting
+        # as the player before it as in _play
+        if self.players is not None:
+            return self.players
+        if implementation not in self._players:
+            game = deepcopy(self._prototype(implementation))
+            moves, _, _ = playout(game, np.random.default_rng(0), 200)
+            game.reset()
+            keys = {getattr(game.current_player, 'value', game.current_player)}
+            for move in moves:
+                game.step(move)
+                keys.add(getattr(game.current_player, 'value', game.current_player))
+            self._players[implementation] = max(len(keys - {None}), 1)
+        return self._players[implementation]
+
+    def _release(self, implementation, game):
+        game.reset()
+        self._idle[implementation].append(game)
+
+
+class _Left(Exception):
+    pass
+
+
+def _reason(game):
+    # Why step turned down the last move, on one line
+    rejection = game.rejection
+    message = rejection.message if rejection is not None else None
+    return ' '.join(str(message or '').split()) or 'not accepted'
+
+
+async def play(implementation, moves, match=None, host='127.0.0.1', port=None, path=None, seated=None):
+    # A scripted stand-in client: takes a seat and answers each TURN with the
+    # next of its moves, leaving once they run out. The seated event, if any,
+    # is set once it has a seat. Returns the seat, the END line and how many
+    # of its moves were rejected
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    moves, seat, rejected = iter(moves), None, 0
+    try:
+        writer.write(f'PLAY {implementation}{"" if match is None else " " + match}\n'.encode())
+        while line := (await reader.readline()).decode():
+            kind, _, rest = line.rstrip('\n').partition(' ')
+            if kind == 'SEAT':
+                seat = int(rest)
+                if seated is not None:
+                    seated.set()
+            elif kind == 'REJECTED':
+                rejected += 1
+            elif kind == 'TURN':
+                move = next(moves, None)
+                if move is None:
+                    break
+                writer.write(f'{move}\n'.encode())
+            elif kind in ('END', 'ERROR'):
+                return seat, line.strip(), rejected
+            await writer.drain()
+        return seat, None, rejected
+    finally:
+        writer.close()
+
+
+async def serve(args):
+    server = MatchServer(args.players, args.move_timeout, args.match_timeout, args.max_matches)
+    address = await server.start(args.host, args.port, args.unix)
+    print(f'Serving {len(server.available)} implementations on {address}')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hosts matches of the implementations for clients over TCP or a Unix socket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7878)
+    parser.add_argument('--unix', help='listen on this Unix socket instead of TCP')
+    parser.add_argument('--players', type=int, help='seats per match, by default the players of each game')
+    parser.add_argument('--move-timeout', type=float, default=30, help='seconds per turn')
+    parser.add_argument('--match-timeout', type=float, default=3600, help='seconds per match')
+    parser.add_argument('--max-matches', type=int, default=10000, help='matches played at once')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
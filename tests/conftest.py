@@ -0,0 +1,33 @@
+import os
+import sys
+from enum import Enum
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from implementations import RESULTS, load_game
+
+
+@pytest.fixture
+def load():
+    # Builds a fresh game of an implementation under Results, e.g. load('Claude/peridot')
+    return lambda label: load_game(os.path.join(RESULTS, label + '.py'))
+
+
+def plain(value):
+    # A value as a to_bytes record gives it back: enum members as their
+    # values, numpy scalars as Python ones
+    if isinstance(value, Enum):
+        return plain(value.value)
+    if isinstance(value, dict):
+        return {plain(key): plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(map(plain, value))
+    if isinstance(value, (set, frozenset)):
+        return set(map(plain, value))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
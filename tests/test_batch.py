@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from batch import BATCHES, BatchPeridot, BatchSaffron
+from game import ORTHOGONAL
+
+
+def play(batch, seed):
+    rng = np.random.default_rng(seed)
+    while not batch.done.all() and batch.ply < 200:
+        batch.step(batch.sample(rng))
+    return batch
+
+
+@pytest.mark.parametrize('model', ['Claude', 'DeepSeek', 'GPT-4o'])
+@pytest.mark.parametrize('name', ['peridot', 'tangerine', 'saffron'])
+def test_batches_agree_with_the_scalar_games(load, name, model):
+    kind = BATCHES[name]
+    batch = kind(load(f'{model}/{name}'), 100, check=20, seed=0, **kind.implemented.get(model, {}))
+    assert play(batch, 0).mismatches == []
+
+
+def test_seats_follow_the_scalar_turn_order(load):
+    # DeepSeek's players are 1 and 2
+    game = load('DeepSeek/peridot')
+    batch = BatchPeridot(game, 10, check=10, seed=0)
+    assert batch.seats == [1, 2] and game.current_player == 1
+    play(batch, 0)
+    assert batch.mismatches == []
+    assert {batch.seat(winner) for winner in batch.winner} <= {None, 1, 2}
+
+
+def test_prompt_rules_disagree_where_the_implementation_differs(load):
+    # By the rule prompt a Saffron piece may step onto a marker and loses,
+    # which Claude's implementation does not allow
+    batch = play(BatchSaffron(load('Claude/saffron'), 100, check=100, seed=0), 0)
+    assert any('rejected' in problem for _, _, problem in batch.mismatches)
+
+
+@pytest.mark.parametrize('rules, lost', [({}, True), (BatchSaffron.implemented['GPT-4o'], False)])
+def test_saffron_pieces_stepping_onto_markers(load, rules, lost):
+    # A starts on 3,3; a B marker goes on the cell below it
+    batch = BatchSaffron(load('Claude/saffron'), 1, **rules)
+    batch.boards[0, 4, 3] = batch.codes[3]
+    batch.legal = batch.legal_mask(np.arange(1))
+    done, winner, _ = batch.step([ORTHOGONAL.index((1, 0))])
+    assert batch.layout(0)[4, 3] == 'A'
+    assert (done[0], winner[0]) == ((True, 1) if lost else (False, -1))
+
+
+def test_unknown_rules_are_refused(load):
+    with pytest.raises(TypeError):
+        BatchSaffron(load('Claude/saffron'), 1, ends_when='never')
@@ -0,0 +1,129 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from game import DIRECTIONS, AccessCounter, BitBoard, Board
+
+LAYOUT = 'A_V\n_ _\nVVA'
+
+
+def test_compact_boards_read_and_write_characters():
+    board, chars = Board((3, 3), LAYOUT, compact=True, symbols='AV'), Board((3, 3), LAYOUT)
+    assert board.codes.dtype == np.int8 and board.codes.tolist() == [[2, 0, 3], [0, 1, 0], [3, 3, 2]]
+    assert np.array_equal(np.asarray(board.layout), np.asarray(chars.layout))
+    assert board.layout[0][2] == board.layout[0, 2] == 'V' and board.layout[1, 1] == Board.NULL
+    assert [list(row) for row in board.layout] == [list(row) for row in chars.layout]
+    assert 'A' in board.layout and 'A' in board.layout[2] and 'A' not in board.layout[1]
+    assert np.array_equal(board.layout == 'V', chars.layout == 'V')
+    assert np.array_equal(board.layout[:, 0], ['A', '_', 'V'])
+    assert str(board) == str(chars)
+
+    board.layout[1][0] = 'B'
+    board.place_piece('V 0,1')
+    assert board.codes[1, 0] == board.symbols.code('B') == 4 and board.layout[0, 1] == 'V'
+    copy = deepcopy(board.layout)
+    copy[0, 0] = 'V'
+    assert board.layout[0, 0] == 'A'
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_layout_writes_go_through_the_board(compact):
+    board = Board((3, 3), compact=compact)
+    snapshot = board.snapshot()
+    board.layout[0, 0] = 'A'
+    board.layout[1][2] = 'V'
+    board.layout[-1, -1] = 'A'
+    board.layout[2][-3] = 'V'
+    board.layout[1, :2] = 'A'
+    assert np.array_equal(np.asarray(board.layout), [list('A__'), list('AAV'), list('V_A')])
+    assert (np.asarray(snapshot) == '_').all()
+    with pytest.raises(IndexError):
+        board.layout[3, 0] = 'A'
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_zobrist_keys_follow_every_write(compact):
+    board = Board((3, 3), compact=compact)
+    assert board.zobrist == 0
+    board.layout[0, 0] = 'A'
+    board.layout[1][2] = 'V'
+    board.layout[2, :] = 'A'
+    board.place_piece('V 1,1')
+    board.move_piece('1,1 1,0')
+    assert board.zobrist == Board((3, 3), 'A__\nV_V\nAAA').zobrist != 0
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_bit_masks_follow_writes_and_undo(compact):
+    board = BitBoard((3, 3), LAYOUT, compact=compact, symbols='AV')
+    assert board.mask('A') == board.bit(0, 0) | board.bit(2, 2)
+    assert board.null == board.bit(1, 1) and board.popcount(board.occupied) == 5
+    mark = board.mark()
+    board.place_piece('A 1,0')
+    board.move_piece('0,2 0,1')
+    board.layout[2, :] = '_'
+    for piece, cells in (('A', [(0, 0), (1, 0)]), ('V', [(0, 1)]), ('_', [(0, 2), (1, 2), (2, 0), (2, 1), (2, 2)])):
+        assert sorted(board.cells(board.mask(piece))) == cells
+    board.undo_to(mark)
+    assert board.masks == BitBoard((3, 3), LAYOUT, compact=compact, symbols='AV').masks
+    with pytest.raises(ValueError):
+        BitBoard((9, 9))
+
+
+def test_bit_shifts_stop_at_the_edges():
+    board = BitBoard((3, 3))
+    row = board.bit(0, 0) | board.bit(0, 1) | board.bit(0, 2)
+    assert board.shift(row, 0, 1) == board.bit(0, 1) | board.bit(0, 2)
+    assert board.shift(row, -1, 0) == 0
+    assert board.fill(board.bit(0, 0), 1, 1, board.full) == board.bit(1, 1) | board.bit(2, 2)
+    assert board.fill(board.bit(0, 0), 1, 0, board.full & ~board.bit(2, 0)) == board.bit(1, 0)
+
+
+def test_geometry_is_shared_and_skips_null_cells():
+    board = Board((3, 3), LAYOUT)
+    geometry = board.geometry
+    assert geometry is Board((3, 3), LAYOUT).geometry is not Board((3, 3)).geometry
+    assert (1, 1) not in geometry.cells and len(geometry.cells) == 8
+    assert geometry.orthogonal[0][1] == ((0, 2), (0, 0))
+    assert geometry.rays[0][1][DIRECTIONS.index((1, 0))] == ()
+    assert geometry.rays[0][0][DIRECTIONS.index((0, 1))] == ((0, 1), (0, 2))
+    assert geometry.knight[0][0] == ((1, 2), (2, 1))
+    assert geometry.null_mask.tolist() == [[False] * 3, [False, True, False], [False] * 3]
+    # Writing over a NULL cell changes the tables
+    board.layout[1, 1] = 'A'
+    assert board.geometry is Board((3, 3)).geometry
+    assert board.geometry.rays[0][1][DIRECTIONS.index((1, 0))] == ((1, 1), (2, 1))
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_rendered_rows_follow_every_write(compact):
+    board = Board((3, 3), LAYOUT, compact=compact, symbols='AV')
+    assert board.line() == 'A_V/_ _/VVA'
+    rendered = str(board)
+    mark = board.mark()
+    board.layout[1][0] = 'V'
+    board.move_piece('2,2 0,1')
+    assert board.line() == 'AAV/V _/VV_'
+    assert str(board) == str(Board((3, 3), 'AAV\nV _\nVV_'))
+    board.undo_to(mark)
+    assert str(board) == rendered and board.line(' ') == 'A_V _ _ VVA'
+
+
+def test_access_counter_counts_cells_by_ply_and_caller():
+    board, counter = Board((3, 3), LAYOUT), AccessCounter()
+    board.count_accesses(counter)
+    board.layout[0, 0]
+    counter.tick()
+    board.layout[2][1]
+    board.place_piece('A 1,0')
+    board.layout == 'V'
+    board.count_accesses(None)
+    board.layout[0, 0]
+    board.layout[0, 0] = 'V'
+
+    summary = counter.summary()
+    assert (summary['plies'], summary['reads'], summary['writes']) == (1, 11, 1)
+    assert summary['peak_reads'] == 10
+    caller = test_access_counter_counts_cells_by_ply_and_caller.__qualname__
+    assert summary['callers'] == {caller: {'reads': 11, 'writes': 1}}
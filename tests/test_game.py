@@ -0,0 +1,310 @@
+import gc
+import pickle
+import string
+import subprocess
+import sys
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from game import (Board, Move, Profiler, Rejection, _pieces, _saved, get_move_elements, is_movement, is_placement,
+                  parse_move, per_position)
+from conftest import ROOT
+
+# A Peridot (noughts and crosses) game won by the first player along the top row
+TOP_ROW = ['A 0,0', 'V 1,0', 'A 0,1', 'V 1,1', 'A 0,2']
+
+# The first moves of a random Daisy game, a movement among them
+DAISY = ['G 7,2', 'f 0,7', 'E 1,2', 'c 1,5', 'C 4,5', 'a 2,7', 'A 5,0', 'b 0,8', 'D 1,0', 'h 3,6',
+         'G 1,6', 'h 8,4', 'E 6,5', 'g 2,8', '6,5 5,5', 'g 8,2', 'F 7,5', 'f 3,5', 'F 5,1', '2,7 1,7']
+
+
+def layout(game):
+    return np.asarray(game.board.layout).copy()
+
+
+def test_step_plays_a_game_to_its_end(load, capsys):
+    game = load('Claude/peridot')
+    for ply, move in enumerate(TOP_ROW[:-1]):
+        assert game.to_play == ply % 2
+        assert game.step(move) == (True, False, None)
+    assert game.step(TOP_ROW[-1]) == (True, True, 0)
+    # Nothing more is accepted once the game is over
+    assert game.step('V 2,2') == (False, True, 0)
+    assert capsys.readouterr().out == ''
+
+
+def test_step_does_not_read_stdin(load, monkeypatch):
+    game = load('Claude/peridot')
+    monkeypatch.setattr('sys.stdin', None)
+    assert game.step('A 1,1') == (True, False, None)
+
+
+def test_reset_returns_to_the_initial_position(load):
+    game = load('Claude/peridot')
+    initial = layout(game)
+    for move in TOP_ROW:
+        game.step(move)
+    game.reset()
+    assert np.array_equal(layout(game), initial)
+    assert game.to_play == 0 and game.round == 1
+    assert game.step(TOP_ROW[0]) == (True, False, None)
+
+
+def test_reset_keeps_settings_made_on_the_instance(load):
+    game = load('Claude/peridot')
+    game.quiet, game.record_extra = True, 99
+    game.step(TOP_ROW[0])
+    game.reset()
+    assert game.quiet and game.record_extra == 99
+
+
+def test_every_step_records_or_clears_the_rejection(load):
+    game = load('Claude/peridot')
+    assert game.step('A 5,5') == (False, False, None)
+    assert game.rejection.reason is Rejection.OFF_BOARD
+    assert game.step('A 0,0') == (True, False, None)
+    assert game.rejection is None
+    assert game.step('hello') == (False, False, None)
+    assert game.rejection.reason is Rejection.MALFORMED
+    assert game.step('V 0,0') == (False, False, None)
+    assert game.rejection.reason is Rejection.RULES
+    assert game.check('V 1,1') is None and game.rejection is None
+    assert game.check('V 0,0').reason is Rejection.RULES
+
+
+def test_moves_are_parsed_once_and_interned():
+    move = parse_move('A 1,2')
+    assert move is parse_move('A 1,2')
+    assert parse_move(move) is move
+    assert move == 'A 1,2' and hash(move) == hash('A 1,2') and str(move) == 'A 1,2'
+    assert (move.placement, move.movement, move.piece, move.positions) == (True, False, 'A', ((1, 2),))
+    assert get_move_elements(move) == ('A', (1, 2))
+    assert pickle.loads(pickle.dumps(move)) is move
+    with pytest.raises(AttributeError):
+        move.piece = 'V'
+
+    movement = parse_move('1,2 3,4')
+    assert (movement.placement, movement.movement, movement.piece) == (False, True, None)
+    assert movement.positions == ((1, 2), (3, 4)) == get_move_elements('1,2 3,4')
+    assert is_movement('1,2 3,4') and not is_placement('1,2 3,4')
+
+    assert parse_move('A 1 , 2').positions == ((1, 2),)
+    malformed = Move('hello')
+    assert not malformed.placement and not malformed.movement and malformed.positions == ()
+
+
+def test_importing_game_leaves_out_numpy_and_inspect():
+    code = "import sys, game; print(sorted({'numpy', 'inspect'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
+
+
+def test_state_snapshots_never_change(load):
+    game = load('Claude/peridot')
+    state = game.get_state()
+    assert game.get_state().layout is state.layout
+    with pytest.raises(ValueError):
+        state.layout[0, 0] = 'A'
+    game.step('A 1,1')
+    assert state.layout[1, 1] == '_'
+    assert game.get_state().layout[1, 1] == 'A'
+    assert game.board.layout[1, 1] == 'A'
+
+
+def test_deep_copies_are_writable_and_independent(load):
+    game = load('Claude/peridot')
+    cells = deepcopy(game.board.layout)
+    cells[0, 0] = 'V'
+    assert game.board.layout[0, 0] == '_'
+    game.step('A 1,1')
+    assert cells[1, 1] == '_'
+
+    other = deepcopy(game)
+    other.step('V 2,2')
+    assert game.board.layout[2, 2] == '_' and game.to_play == 1
+
+
+def test_undo_to_restores_board_and_attributes(load):
+    game = load('Claude/daisy')
+    for move in DAISY[:10]:
+        assert game.step(move)[0]
+    before = layout(game), deepcopy(game.reserves), game.to_play, game.round
+    mark = game.mark()
+    for _ in range(2):
+        for move in DAISY[10:]:
+            assert game.step(move)[0]
+        game.undo_to(mark)
+        assert np.array_equal(layout(game), before[0])
+        assert (game.reserves, game.to_play, game.round) == before[1:]
+
+
+def test_undo_to_any_live_mark(load):
+    game = load('Claude/peridot')
+    first = game.mark()
+    game.step('A 0,0')
+    second = game.mark()
+    game.step('V 1,1')
+    third = game.mark()
+    game.step('A 2,2')
+    game.undo_to(third)
+    assert game.board.layout[2, 2] == '_' and game.board.layout[1, 1] == 'V'
+    game.undo_to(second)
+    assert game.board.layout[1, 1] == '_' and game.board.layout[0, 0] == 'A'
+    game.undo_to(first)
+    assert (np.asarray(game.board.layout) == '_').all() and game.to_play == 0
+
+
+def test_marks_no_longer_held_let_the_journal_shrink(load):
+    game = load('Claude/peridot')
+    board = game.board
+    first = game.mark()
+    game.step('A 0,0')
+    second = game.mark()
+    game.step('V 1,1')
+    del second
+    gc.collect()
+    # The first mark still needs every entry
+    game.mark()
+    assert board._journal_start == 0 and len(board._journal) == 2
+
+    del first
+    gc.collect()
+    game.step('A 2,2')
+    last = game.mark()
+    assert board._journal_start == 3 and board._journal == []
+    game.step('V 0,2')
+    game.undo_to(last)
+    assert board.layout[0, 2] == '_' and board.layout[2, 2] == 'A'
+
+
+def test_zobrist_keys_depend_only_on_the_cells(load):
+    game = load('Claude/peridot')
+    for move in ['A 0,0', 'V 1,1', 'A 2,2']:
+        game.step(move)
+    key, position = game.board.zobrist, game.position_hash()
+    assert key == Board((3, 3), 'A__\n_V_\n__A').zobrist
+
+    game.reset()
+    for move in ['A 2,2', 'V 1,1', 'A 0,0']:
+        game.step(move)
+    assert (game.board.zobrist, game.position_hash()) == (key, position)
+    mark = game.mark()
+    game.step('V 0,1')
+    assert game.board.zobrist != key and game.position_hash() != position
+    game.undo_to(mark)
+    assert (game.board.zobrist, game.position_hash()) == (key, position)
+
+
+def _brute_force(game):
+    # Every placement of any letter or piece and every movement between two
+    # cells that validate_move accepts
+    board = game.board
+    cells = [(x, y) for x in range(board.height) for y in range(board.width)]
+    pieces = sorted(set(string.ascii_letters) | _pieces(game))
+    moves = [f'{piece} {x},{y}' for piece in pieces for x, y in cells]
+    moves += [f'{a},{b} {x},{y}' for a, b in cells for x, y in cells if (a, b) != (x, y)]
+    legal = set()
+    for move in moves:
+        try:
+            if game.check(move) is None:
+                legal.add(move)
+        except Exception:
+            pass
+    return legal
+
+
+@pytest.mark.parametrize('label', ['Claude/peridot', 'GPT-4o/tangerine', 'DeepSeek/lazuli', 'Claude/lilac',
+                                   'Claude/violet'])
+def test_legal_moves_are_every_move_validate_move_accepts(load, label):
+    game = load(label)
+    rng = np.random.default_rng(0)
+    for _ in range(4):
+        legal = game.legal_moves()
+        assert all(type(move) is Move for move in legal)
+        assert set(map(str, legal)) == _brute_force(game)
+        if not legal or game.step(legal[rng.integers(len(legal))])[1]:
+            break
+
+
+def test_no_moves_are_legal_once_the_game_is_over(load):
+    game = load('Claude/peridot')
+    assert len(game.legal_moves()) == 9
+    for move in TOP_ROW:
+        game.step(move)
+    assert game.legal_moves() == ()
+    game.reset()
+    assert len(game.legal_moves()) == 9
+
+
+def test_full_caches_start_over(load, monkeypatch):
+    monkeypatch.setattr('game.MOVE_CACHE_LIMIT', 2)
+    game = load('Claude/peridot')
+    for move in TOP_ROW[:3]:
+        game.legal_moves()
+        game.step(move)
+    assert len(game._legal) == 1
+    assert game.legal_moves() is game.legal_moves()
+    assert len(game._legal) == 2
+    # Moves parsed past the limit are still interned
+    for text in ['A 0,0', 'A 0,1', 'A 0,2']:
+        assert parse_move(text) is parse_move(text)
+
+
+def test_saved_attributes_keep_their_aliases():
+    shared = [1, 2]
+    attributes = {'a': shared, 'b': shared, 'c': (1, 'x'), 'd': {'k': [shared]}}
+    saved = _saved(attributes, None)
+    assert saved['a'] is saved['b'] and saved['a'] is not shared and saved['a'] == shared
+    assert saved['c'] is attributes['c']
+    assert saved['d']['k'][0] is saved['a']
+
+
+def test_profiled_games_time_every_lifecycle_call(load):
+    game = load('Claude/peridot')
+    kind, profiler = type(game), Profiler(size=4)
+    game.profile(profiler, 'peridot')
+    assert isinstance(game, kind)
+    for move in TOP_ROW:
+        game.step(move)
+    summary = profiler.summary()['peridot']
+    assert summary['perform_move']['calls'] == 5 and summary['validate_move']['calls_per_ply'] >= 1
+    assert all(entry['ns'] >= 0 for entry in summary.values())
+    # Only the latest calls are buffered, oldest first, with the ply they were made in
+    assert profiler.count > 4 and len(profiler.recent()) == 4
+    assert [ply for _, ply, _, _ in profiler.recent()] == sorted(ply for _, ply, _, _ in profiler.recent())
+    assert profiler.recent()[-1][1] == 5
+
+    game.profile(None)
+    assert type(game) is kind and '_profile' not in vars(game)
+    game.reset()
+    game.step(TOP_ROW[0])
+    assert profiler.summary()['peridot']['perform_move']['calls'] == 5
+
+
+def test_memos_last_until_the_board_changes(load):
+    game = load('Claude/peridot')
+    calls = []
+
+    @per_position
+    def counted(self, n):
+        calls.append(n)
+        return n * 2
+
+    assert counted(game, 1) == counted(game, 1) == 2
+    assert counted(game, 2) == 4 and calls == [1, 2]
+    assert game.memo('key', calls.append, 'memo') is None and game.memo('key', calls.append, 'again') is None
+    assert calls == [1, 2, 'memo']
+    # A move, and its undo, start the memo over; so does the player moving
+    mark = game.mark()
+    game.step('A 1,1')
+    counted(game, 1)
+    game.undo_to(mark)
+    counted(game, 1)
+    assert calls == [1, 2, 'memo', 1, 1]
+    game.current_player = game.next_player()
+    counted(game, 1)
+    assert calls[-1] == 1 and len(calls) == 6
+    # Unhashable arguments are computed every time
+    assert game.memo(['key'], len, 'ab') == game.memo(['key'], len, 'ab') == 2
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from mcts import MCTS, random_rollout
+
+
+def play(game, moves):
+    for move in moves:
+        assert game.step(move)[0]
+    return game
+
+
+def test_search_leaves_the_game_as_it_found_it(load):
+    game = load('Claude/daisy')
+    before = np.asarray(game.board.layout).copy(), game.to_play, game.board.zobrist
+    engine = MCTS(playouts=50)
+    assert engine.search(game, np.random.default_rng(0)) == 50
+    assert np.array_equal(np.asarray(game.board.layout), before[0])
+    assert (game.to_play, game.board.zobrist) == before[1:]
+    assert sum(visits for visits, _ in engine.statistics().values()) == 50
+
+
+def test_choose_wins_and_blocks_at_noughts_and_crosses(load):
+    engine = MCTS(playouts=400)
+    game = play(load('Claude/peridot'), ['A 0,0', 'V 1,0', 'A 0,1', 'V 1,1'])
+    assert engine.choose(game, np.random.default_rng(0)) == 'A 0,2'
+    game = play(load('Claude/peridot'), ['A 0,0', 'V 1,1', 'A 0,1'])
+    assert MCTS(playouts=400).choose(game, np.random.default_rng(0)) == 'V 0,2'
+
+
+def test_the_tree_is_kept_between_moves(load):
+    game = load('Claude/peridot')
+    engine = MCTS(playouts=200)
+    rng = np.random.default_rng(0)
+    engine.search(game, rng)
+    move = engine.best()
+    visits = engine.statistics()[move][0]
+    game.step(move)
+    engine.search(game, rng, playouts=1)
+    assert engine.visits[0] == visits + 1
+
+
+def test_no_move_is_chosen_once_the_game_is_over(load):
+    game = play(load('Claude/peridot'), ['A 0,0', 'V 1,0', 'A 0,1', 'V 1,1', 'A 0,2'])
+    assert MCTS(playouts=10).choose(game) is None
+    assert random_rollout(game, np.random.default_rng(0)) is None
+
+
+@pytest.mark.parametrize('label', ['Claude/violet', 'Claude/amethyst-adapted', 'Claude/topaz'])
+def test_rollout_moves_are_legal(load, label):
+    game = load(label)
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        move = random_rollout(game, rng)
+        if move is None:
+            break
+        assert move in game.legal_moves()
+        if game.step(move)[1]:
+            break
@@ -0,0 +1,123 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import plain
+from game import _pack, _unpack
+from implementations import playout
+from positions import TIE, UNKNOWN, PositionStore, store_game
+from records import RecordWriter, read_records, replay
+
+# One implementation for every board shape, among them the ones whose
+# records need the most extra bytes (Claude's daisy and amethyst-adapted),
+# whose player can be None (DeepSeek's lazuli) and whose winner is a piece
+# symbol (DeepSeek's orchid-adapted)
+SHAPES = [
+    'Claude/peridot',            # 3x3
+    'DeepSeek/orchid-adapted',   # 5x5
+    'Claude/tangerine',          # 6x6
+    'DeepSeek/lazuli',           # 7x7 with NULL corners
+    'Claude/topaz',              # 7x7 with NULL cells
+    'Claude/amethyst-adapted',   # 8x8
+    'Claude/daisy',              # 9x9
+    'Claude/violet',             # 10x10
+]
+
+
+def positions(game, moves):
+    # The game after each of moves, the initial position first
+    game.reset()
+    yield game
+    for move in moves:
+        game.step(move)
+        yield game
+
+
+def expected(game):
+    layout, player, *extra = game.get_state()
+    return np.asarray(layout), plain(player), plain(list(extra[0] if extra else []))
+
+
+@pytest.mark.parametrize('value', ['x' * 300, list(range(300)), {str(i): i for i in range(300)}, (None, True, -1, 2.5, 1 << 40, {'a'})])
+def test_values_pack_and_unpack(value):
+    data = _pack(value)
+    assert _unpack(memoryview(data), 0) == (value, len(data))
+
+
+def test_packing_refuses_what_a_length_cannot_hold():
+    with pytest.raises(ValueError):
+        _pack('x' * 0x10000)
+
+
+def test_daisy_records_round_trip(load):
+    game = load('Claude/daisy')
+    moves, _, _ = playout(game, np.random.default_rng(0), 60)
+    for position in positions(game, moves):
+        record = position.to_bytes()
+        assert len(record) == position.record_size
+        state = position.from_bytes(record)
+        layout, player, extra = expected(position)
+        assert np.array_equal(state.layout, layout)
+        assert (state.current_player, state.extra) == (player, extra)
+        assert state.extra[0] == plain(position.reserves)
+
+
+@pytest.mark.parametrize('label', SHAPES)
+def test_positions_round_trip(load, tmp_path, label):
+    game = load(label)
+    moves, finished, winner = playout(game, np.random.default_rng(0), 60)
+    with PositionStore(str(tmp_path / 'positions'), game.record_size) as store:
+        store_game(store, game, moves, 7)
+        rows = store.rows
+        assert len(rows) == len(moves) + 1
+        assert (rows['game'] == 7).all() and list(rows['ply']) == list(range(len(rows)))
+        for ply, position in enumerate(positions(game, moves)):
+            state = store.state(ply, position)
+            layout, player, extra = expected(position)
+            assert np.array_equal(state.layout, layout)
+            assert (state.current_player, state.extra) == (player, extra)
+            assert store.player(rows['player'][ply]) == json.loads(json.dumps(player))
+
+        outcomes = set(rows['outcome'].tolist())
+        if not finished:
+            assert outcomes == {UNKNOWN}
+        elif winner is None:
+            assert outcomes == {TIE}
+        else:
+            assert [store.player(outcome) for outcome in outcomes] == [plain(winner)]
+
+    # Reopened, the store finds its record size and players again
+    game.reset()
+    with PositionStore(str(tmp_path / 'positions')) as store:
+        assert store.record_size == game.record_size and len(store) == len(moves) + 1
+        assert store.player(int(store.rows['player'][0])) == plain(game.current_player)
+
+
+@pytest.mark.parametrize('path', ['records.jsonl', 'records.jsonl.gz'])
+@pytest.mark.parametrize('label', SHAPES)
+def test_records_replay(load, tmp_path, label, path):
+    game = load(label)
+    moves, finished, winner = playout(game, np.random.default_rng(1), 60)
+    game.reset()
+    with RecordWriter(tmp_path / path) as writer:
+        writer.begin(implementation=label + '.py', seed=1)
+        for move in moves:
+            game.step(move)
+            writer.move(move, game)
+        writer.end(finished, winner)
+
+    record, = read_records(tmp_path / path)
+    assert record.header == {'implementation': label + '.py', 'seed': 1}
+    assert record.moves == [str(move) for move in moves] and len(record.digests) == len(moves)
+    assert record.result == {'finished': finished, 'winner': plain(winner)}
+    played = list(replay(record, game))
+    assert [move for move, _, _ in played] == record.moves
+    if played:
+        assert played[-1][1:] == (finished, winner)
+
+    # A digest that no longer matches the position is caught
+    if moves:
+        record.digests[-1] = '0' * 16
+        with pytest.raises(ValueError):
+            list(replay(record, game))
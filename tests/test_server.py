@@ -0,0 +1,70 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from implementations import playout
+from server import MatchServer, play
+
+# A Peridot game won by seat 0 along the top row, split by seat
+TOP_ROW = [['A 0,0', 'A 0,1', 'A 0,2'], ['V 1,0', 'V 1,1']]
+
+
+async def serve(clients, **options):
+    # Runs the scripted clients against a server on a free localhost port,
+    # each taking its seat before the next connects
+    server = MatchServer(move_timeout=5, match_timeout=20, **options)
+    _, port = await server.start(port=0)
+    try:
+        tasks = []
+        for implementation, moves, match in clients:
+            seated = asyncio.Event()
+            tasks.append(asyncio.create_task(play(implementation, moves, match, port=port, seated=seated)))
+            await asyncio.wait_for(seated.wait(), 20)
+        return await asyncio.gather(*tasks), server
+    finally:
+        await server.close()
+
+
+def test_a_match_is_played_to_its_end():
+    results, server = asyncio.run(serve([('Claude/peridot', TOP_ROW[0], 'm'), ('Claude/peridot', TOP_ROW[1], 'm')]))
+    assert results == [(0, 'END WIN 0', 0), (1, 'END WIN 0', 0)]
+    assert server.played == 1
+
+
+def test_rejected_moves_are_reported_and_retried():
+    moves = ['A 5,5', 'hello', *TOP_ROW[0]]
+    results, _ = asyncio.run(serve([('Claude/peridot', moves, 'm'), ('Claude/peridot', TOP_ROW[1], 'm')]))
+    assert results[0] == (0, 'END WIN 0', 2)
+
+
+def test_a_client_leaving_ends_the_match():
+    results, _ = asyncio.run(serve([('Claude/peridot', TOP_ROW[0][:1], 'm'), ('Claude/peridot', TOP_ROW[1], 'm')]))
+    assert results[1] == (1, 'END LEFT 0', 0)
+
+
+@pytest.mark.parametrize('label', ['Claude/lazuli', 'DeepSeek/lazuli'])
+def test_single_player_games_take_one_seat(load, label):
+    moves, finished, winner = playout(load(label), np.random.default_rng(0))
+    assert finished
+    results, server = asyncio.run(serve([(label, moves, None)]))
+    assert server.seats(label) == 1
+    assert results == [(0, 'END TIE' if winner is None else 'END WIN 0', 0)]
+
+
+def test_null_cells_are_sent_as_hashes():
+    async def first_turn():
+        server = MatchServer(move_timeout=5)
+        _, port = await server.start(port=0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'PLAY Claude/lazuli\n')
+        lines = [(await reader.readline()).decode() for _ in range(3)]
+        writer.close()
+        await server.close()
+        return lines
+
+    seat, start, turn = asyncio.run(first_turn())
+    assert (seat, start) == ('SEAT 0\n', 'START\n')
+    rows = turn.split()[1].split('/')
+    assert len(turn.split()) == 2 and len(rows) == 7
+    assert rows[0] == '##XXX##' and rows[3] == 'XXX_XXX'
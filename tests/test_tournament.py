@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import tournament
+from implementations import RESULTS
+from records import replay
+from tournament import play_match, schedule
+
+PERIDOT = os.path.join(RESULTS, 'Claude', 'peridot.py')
+
+
+@pytest.fixture(scope='module', autouse=True)
+def warm():
+    tournament._warm([PERIDOT, os.path.join(RESULTS, 'Claude', 'quartz.py.missing')])
+
+
+def test_schedule_pairs_every_ordered_pair():
+    jobs = schedule(['x.py', 'y.py'], ['first', 'random', 'mcts'], 2, seed=10)
+    assert len(jobs) == 2 * 6 * 2
+    assert [job[3] for job in jobs] == list(range(10, 10 + len(jobs)))
+    assert {(a, b) for _, a, b, _ in jobs} == {('first', 'random'), ('random', 'first'), ('first', 'mcts'),
+                                               ('mcts', 'first'), ('random', 'mcts'), ('mcts', 'random')}
+    assert schedule(['x.py'], ['random'], 3) == [('x.py', 'random', 'random', i) for i in range(3)]
+
+
+@pytest.mark.parametrize('players', [('random', 'first'), ('mcts', 'random'), ('mcts', 'mcts')])
+def test_matches_replay_and_repeat(load, players):
+    job = (PERIDOT, *players, 3)
+    record = play_match(job)
+    assert record.header == {'implementation': os.path.join('Claude', 'peridot.py'), 'players': list(players), 'seed': 3}
+    assert record.result['finished'] and record.result['plies'] == len(record.moves)
+    assert [move for move, _, _ in replay(record, load('Claude/peridot'))] == record.moves
+    # Nothing is left over from the last game of the worker
+    again = play_match(job)
+    assert (again.moves, again.result) == (record.moves, record.result)
+
+
+def test_mcts_does_not_lose_to_random_play():
+    # Noughts and crosses, moving second, with MCTS_PLAYOUTS playouts a move
+    for seed in range(3):
+        record = play_match((PERIDOT, 'random', 'mcts', seed))
+        assert record.result['winner'] != 0
+
+
+def test_implementations_that_fail_to_build_are_reported():
+    record = play_match((os.path.join(RESULTS, 'Claude', 'quartz.py.missing'), 'random', 'first', 0))
+    assert record.moves == [] and not record.result['finished']
+    assert record.result['error'].startswith('FileNotFoundError')
@@ -0,0 +1,163 @@
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+
+import numpy as np
+
+from implementations import RESULTS, implementations, load_game
+from mcts import MCTS
+from records import Record, RecordWriter
+
+
+def random_player(game, rng):
+    # A uniformly random legal move, or None when there is none
+    legal = game.legal_moves()
+    return legal[rng.integers(len(legal))] if legal else None
+
+
+def first_player(game, rng):
+    # The first legal move in candidate order
+    legal = game.legal_moves()
+    return legal[0] if legal else None
+
+
+# Playouts the mcts player runs per move. A playout budget rather than a
+# time budget keeps seeded games reproducible
+MCTS_PLAYOUTS = 100
+
+
+def mcts_player():
+    # The move UCT search rates best after MCTS_PLAYOUTS playouts. Every
+    # game gets a search of its own, whose tree carries over from one of its
+    # moves to the next and goes with it when the game ends
+    return MCTS(playouts=MCTS_PLAYOUTS).choose
+
+
+# Strategies by name, as functions called once per game and seat that return
+# the function picking a move for the player to move in game
+PLAYERS = {'random': lambda: random_player, 'first': lambda: first_player, 'mcts': mcts_player}
+
+# Games built by this worker, by implementation, and the errors of those that
+# could not be built
+_games = {}
+_failed = {}
+
+
+def _warm(paths):
+    # Worker initializer: imports game and builds every implementation once,
+    # so that jobs only reset and replay them
+    for path in paths:
+        try:
+            _games[path] = load_game(path)
+        except Exception as e:
+            _failed[path] = f'{type(e).__name__}: {e}'
+
+
+def play_match(job, max_plies=500):
+    # Plays one (implementation, player A, player B, seed) job. Seat 0 takes
+    # the first turn and seats follow the order players first get the turn.
+    # Returns a Record whose result also holds the plies played and, when the
+    # game broke down, the error
+    path, a, b, seed = job
+    header = {'implementation': os.path.relpath(path, RESULTS), 'players': [a, b], 'seed': seed}
+    if path in _failed:
+        return Record(header, [], result={'finished': False, 'winner': None, 'error': _failed[path]})
+
+    game, rng = _games[path], np.random.default_rng(seed)
+    strategies = [PLAYERS[a](), PLAYERS[b]()]
+    seats, moves, finished, winner, error = {}, [], False, None, None
+    game.reset()
+    try:
+        while len(moves) < max_plies:
+            seat = seats.setdefault(_key(game.current_player), len(seats))
+            move = strategies[seat % 2](game, rng)
+            if move is None:
+                break
+            accepted, finished, winner = game.step(move)
+            if not accepted:
+                break
+            moves.append(move)
+            if finished:
+                break
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+
+    result = {'finished': finished, 'winner': None if winner is None else seats.setdefault(_key(winner), len(seats)),
+              'plies': len(moves)}
+    if error is not None:
+        result['error'] = error
+    return Record(header, moves, result=result)
+
+
+def _key(player):
+    return getattr(player, 'value', player)
+
+
+def schedule(paths, players, games, seed=0):
+    # Every ordered pairing of distinct players on every implementation,
+    # games times each, with seeds numbered from seed
+    jobs = []
+    for path in paths:
+        for a, b in permutations(players, 2) if len(players) > 1 else [(players[0], players[0])]:
+            for _ in range(games):
+                jobs.append((path, a, b, seed + len(jobs)))
+    return jobs
+
+
+def run(jobs, workers=None, chunksize=16, max_plies=500):
+    # Yields each job's Record as the workers finish them, in job order
+    paths = sorted({job[0] for job in jobs})
+    with ProcessPoolExecutor(workers, initializer=_warm, initargs=(paths,)) as executor:
+        yield from executor.map(play_match, jobs, [max_plies] * len(jobs), chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays the players against each other on every implementation over a process pool.')
+    parser.add_argument('--name', default='*', help='only implementations of this game')
+    parser.add_argument('--model', default='*', help='only implementations from this Results directory')
+    parser.add_argument('--players', nargs='+', default=['first', 'random'], choices=sorted(PLAYERS),
+                        help='mcts plays far slower than the others, so it only plays when named')
+    parser.add_argument('--games', type=int, default=10, help='games per implementation and pairing')
+    parser.add_argument('--plies', type=int, default=500, help='longest game')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, help='processes, one per core by default')
+    parser.add_argument('--chunksize', type=int, default=16, help='jobs sent to a worker at a time')
+    parser.add_argument('--out', help='append the games to this record file, e.g. games.jsonl.gz')
+    args = parser.parse_args()
+
+    jobs = schedule(implementations(args.name, args.model), args.players, args.games, args.seed)
+    writer = RecordWriter(args.out, digests=False) if args.out else None
+    standings, errors, plies = Counter(), Counter(), 0
+    start = time.perf_counter()
+    try:
+        for record in run(jobs, args.workers, args.chunksize, args.plies):
+            if writer is not None:
+                writer.write(record)
+            result = record.result
+            plies += result['plies']
+            if 'error' in result:
+                errors[record.header['implementation']] += 1
+            elif not result['finished']:
+                standings['unfinished'] += 1
+            elif result['winner'] is None:
+                standings['tie'] += 1
+            else:
+                standings[record.header['players'][result['winner'] % 2]] += 1
+    finally:
+        if writer is not None:
+            writer.close()
+    elapsed = time.perf_counter() - start
+
+    print(f'{len(jobs)} games, {plies} plies in {elapsed:.2f}s: {len(jobs) / elapsed:.0f} games/s')
+    for name, wins in standings.most_common():
+        print(f'{name:<12}{wins:>8}')
+    for implementation, count in sorted(errors.items()):
+        print(f'{implementation}: {count} games stopped by errors', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()